@@ -3,9 +3,6 @@ Advanced Trading Configuration - Optimized for Maximum Profitability
 Ultra-precise parameters based on deep market analysis
 """
 
-import os
-import math
-
 class AdvancedTradingConfig:
     def __init__(self):
         """Initialize advanced trading configuration"""
@@ -274,16 +271,18 @@ class AdvancedTradingConfig:
 # Global advanced config instance
 advanced_config = AdvancedTradingConfig()
 
+# Mode name -> mode configuration, built once for get_mode_config
+MODE_CONFIGS = {
+    'CONSERVATIVE': advanced_config.CONSERVATIVE_CONFIG,
+    'BALANCED': advanced_config.BALANCED_CONFIG,
+    'AGGRESSIVE': advanced_config.AGGRESSIVE_CONFIG,
+    'ULTRA_HFT': advanced_config.ULTRA_HFT_CONFIG
+}
+
 # Helper functions for configuration
 def get_mode_config(mode):
     """Get configuration for specific trading mode"""
-    mode_configs = {
-        'CONSERVATIVE': advanced_config.CONSERVATIVE_CONFIG,
-        'BALANCED': advanced_config.BALANCED_CONFIG,
-        'AGGRESSIVE': advanced_config.AGGRESSIVE_CONFIG,
-        'ULTRA_HFT': advanced_config.ULTRA_HFT_CONFIG
-    }
-    return mode_configs.get(mode, advanced_config.BALANCED_CONFIG)
+    return MODE_CONFIGS.get(mode, advanced_config.BALANCED_CONFIG)
 
 def calculate_position_size(balance, risk_pct, entry_price, stop_loss_price):
     """Calculate optimal position size based on risk management"""
@@ -4,13 +4,98 @@ Ultra-fast, reliable market data with multiple sources
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import time
 import numpy as np
-import pandas as pd
 import threading
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 import random
 import math
+from collections import deque
+from indicators import IndicatorState, window_range
+
+# Number of ticks kept per symbol
+PRICE_CACHE_SIZE = 1000
+
+# Seconds of tick timestamps kept in price_history
+PRICE_HISTORY_SECONDS = 3600
+
+# Seconds between real-price API refreshes, and how long a fetched price
+# may stand in for live data before the feed falls back to simulation
+REAL_PRICE_REFRESH_INTERVAL = 1.0
+REAL_PRICE_MAX_AGE = 5.0
+
+# Longest pause, in seconds, before retrying a symbol whose API keeps failing
+REAL_PRICE_MAX_BACKOFF = 60.0
+
+# Simulation starting prices when no tick history exists yet
+SIM_BASE_PRICES = {
+    'XAUUSDm': 2650.0,
+    'EURUSD': 1.0500,
+    'GBPUSD': 1.2500,
+    'USDJPY': 155.00,
+    'BTCUSD': 95000.0
+}
+
+# Simulated daily volatility per symbol
+SIM_VOLATILITIES = {
+    'XAUUSDm': 0.015,    # 1.5% daily volatility
+    'EURUSD': 0.008,     # 0.8% daily volatility
+    'GBPUSD': 0.012,     # 1.2% daily volatility
+    'USDJPY': 0.010,     # 1.0% daily volatility
+    'BTCUSD': 0.040      # 4.0% daily volatility
+}
+
+# Quote precision per symbol
+DECIMAL_PLACES = {
+    'XAUUSDm': 2,
+    'EURUSD': 5,
+    'GBPUSD': 5,
+    'USDJPY': 3,
+    'BTCUSD': 0
+}
+
+class PriceRingBuffer:
+    """Fixed-capacity tick history backed by a preallocated float64 array.
+    
+    Each price is stored twice (at i and i + capacity) so the most recent
+    prices always form one contiguous slice: appends never shift or copy
+    data and reads return views instead of new arrays.
+    """
+    
+    __slots__ = ('capacity', '_data', '_end', '_count')
+    
+    def __init__(self, capacity=PRICE_CACHE_SIZE):
+        self.capacity = capacity
+        self._data = np.zeros(2 * capacity, dtype=np.float64)
+        self._end = capacity  # One past the newest price in the upper half
+        self._count = 0
+    
+    def __len__(self):
+        return self._count
+    
+    def append(self, price):
+        """Add the newest price, overwriting the oldest when full"""
+        i = self._end % self.capacity
+        self._data[i] = price
+        self._data[i + self.capacity] = price
+        self._end = i + self.capacity + 1
+        if self._count < self.capacity:
+            self._count += 1
+    
+    def last(self):
+        """Newest price"""
+        return float(self._data[self._end - 1])
+    
+    def view(self, periods):
+        """Contiguous view of the newest `periods` prices, oldest first.
+        
+        The view aliases the buffer, so it is only stable until `capacity`
+        further appends.
+        """
+        n = min(periods, self._count)
+        return self._data[self._end - n:self._end]
 
 class AdvancedMarketDataProvider:
     def __init__(self):
@@ -19,13 +104,32 @@ class AdvancedMarketDataProvider:
         self.data_sources = ['primary', 'backup1', 'backup2', 'simulation']
         self.current_source = 'simulation'  # Start with simulation
         self.price_history = {}
+        self.indicator_state = {}
         self.update_thread = None
+        self.refresh_thread = None
+        self._real_prices = ({}, 0.0)  # (prices by symbol, monotonic fetch time)
+        self._feed_pass = 0  # Completed update passes, versions the status cache
+        self._last_update = None  # Wall-clock time of the last pass
+        self._feed_status = (None, None)  # (cache key, status dict)
         self.running = False
+        self._stop_event = threading.Event()  # Wakes the update loop on stop
         
         # Market data configuration
         self.symbols = ['XAUUSDm', 'EURUSD', 'GBPUSD', 'USDJPY', 'BTCUSD']
         self.update_interval = 0.1  # 100ms updates
         
+        # Persistent HTTP session - price APIs are polled every update, so
+        # keep their TLS connections alive instead of reconnecting each time
+        self._http = requests.Session()
+        self._http.mount("https://", HTTPAdapter(pool_connections=3, pool_maxsize=len(self.symbols)))
+        
+        # One fetch worker per symbol - a pass waits for the slowest API
+        # instead of the sum of all of them
+        self._fetch_pool = ThreadPoolExecutor(max_workers=len(self.symbols),
+                                              thread_name_prefix="price-fetch")
+        self._response_cache = {}  # url -> (etag, last_modified, parsed json)
+        self._fetch_backoff = {}  # symbol -> (monotonic retry time, failures)
+        
         print("✅ Advanced Market Data Provider initialized")
     
     def start_data_feed(self):
@@ -34,74 +138,85 @@ class AdvancedMarketDataProvider:
             return
         
         self.running = True
+        self._stop_event.clear()
         self.update_thread = threading.Thread(target=self._data_update_loop)
         self.update_thread.daemon = True
         self.update_thread.start()
         
+        # Real prices are fetched on their own thread so slow APIs never
+        # hold up the tick loop
+        self.refresh_thread = threading.Thread(target=self._real_price_refresh_loop)
+        self.refresh_thread.daemon = True
+        self.refresh_thread.start()
+        
         print("🚀 Market data feed started")
     
     def stop_data_feed(self):
         """Stop data feed"""
         self.running = False
+        self._stop_event.set()
         if self.update_thread:
             self.update_thread.join(timeout=1)
+        if self.refresh_thread:
+            self.refresh_thread.join(timeout=1)
         print("🛑 Market data feed stopped")
     
     def _data_update_loop(self):
         """Main data update loop with real-time APIs and fallback"""
         while self.running:
+            # Fixed cadence - fetch time counts against the update interval
+            deadline = time.monotonic() + self.update_interval
             try:
-                for symbol in self.symbols:
-                    # Try to get real price first, fallback to simulation
-                    real_price = self._fetch_real_price(symbol)
-                    if real_price:
-                        price = real_price
-                        self.current_source = 'real_api'
-                    else:
-                        price = self._generate_realistic_price(symbol)
-                        self.current_source = 'simulation'
-                    
+                # Use fresh real prices first, fallback to simulation
+                real_prices, fetched_at = self._real_prices
+                if time.monotonic() - fetched_at > REAL_PRICE_MAX_AGE:
+                    real_prices = {}
+                prices = {symbol: real_prices.get(symbol) for symbol in self.symbols}
+                simulated = [symbol for symbol, price in prices.items() if not price]
+                if simulated:
+                    prices.update(zip(simulated, self._generate_realistic_prices(simulated)))
+                self.current_source = 'simulation' if simulated else 'real_api'
+                
+                for symbol, price in prices.items():
                     self._update_price_cache(symbol, price)
+                self._last_update = time.time()
+                self._feed_pass += 1
                 
-                time.sleep(self.update_interval)
+                self._stop_event.wait(max(0.0, deadline - time.monotonic()))
                 
             except Exception as e:
                 print(f"❌ Data update error: {e}")
-                time.sleep(1)
+                self._stop_event.wait(1)
     
-    def _generate_realistic_price(self, symbol):
-        """Generate realistic price movements"""
-        base_prices = {
-            'XAUUSDm': 2650.0,
-            'EURUSD': 1.0500,
-            'GBPUSD': 1.2500,
-            'USDJPY': 155.00,
-            'BTCUSD': 95000.0
-        }
-        
-        volatilities = {
-            'XAUUSDm': 0.015,    # 1.5% daily volatility
-            'EURUSD': 0.008,     # 0.8% daily volatility
-            'GBPUSD': 0.012,     # 1.2% daily volatility
-            'USDJPY': 0.010,     # 1.0% daily volatility
-            'BTCUSD': 0.040      # 4.0% daily volatility
-        }
-        
-        base_price = base_prices.get(symbol, 1.0)
-        volatility = volatilities.get(symbol, 0.01)
+    def _real_price_refresh_loop(self):
+        """Refresh real API prices in the background (own thread)"""
+        while self.running:
+            try:
+                fetched = self._fetch_pool.map(self._fetch_with_backoff, self.symbols)
+                prices = {symbol: price for symbol, price in zip(self.symbols, fetched) if price}
+                # One tuple assignment - the tick loop never sees a mixed set
+                self._real_prices = (prices, time.monotonic())
+            except Exception as e:
+                print(f"❌ Real price refresh error: {e}")
+            self._stop_event.wait(REAL_PRICE_REFRESH_INTERVAL)
+    
+    def _generate_realistic_prices(self, symbols):
+        """Generate realistic price movements for several symbols in one step"""
+        base_price = [SIM_BASE_PRICES.get(symbol, 1.0) for symbol in symbols]
+        volatility = np.array([SIM_VOLATILITIES.get(symbol, 0.01) for symbol in symbols])
         
-        # Get previous price for trend continuation
-        if symbol in self.price_cache and len(self.price_cache[symbol]) > 0:
-            prev_price = self.price_cache[symbol][-1]
-        else:
-            prev_price = base_price
+        # Get previous prices for trend continuation
+        prev_price = np.array([
+            self.price_cache[symbol].last() if self.price_cache.get(symbol) else base
+            for symbol, base in zip(symbols, base_price)
+        ])
         
         # Generate price movement using GBM (Geometric Brownian Motion)
         dt = self.update_interval / (24 * 3600)  # Convert to daily fraction
         drift = 0.0001  # Small positive drift
         
-        # Random walk component
-        random_component = np.random.normal(0, 1)
+        # Random walk component, drawn for every symbol at once
+        random_component = np.random.standard_normal(len(symbols))
         
         # Price change calculation
         price_change = prev_price * (
@@ -125,94 +240,108 @@ class AdvancedMarketDataProvider:
             volatility_multiplier = 0.8
         
         # Apply session-based adjustments
-        if random.random() < 0.1:  # 10% chance of larger move
-            new_price += prev_price * volatility * volatility_multiplier * random.uniform(-2, 2)
+        large_move = np.random.random(len(symbols)) < 0.1  # 10% chance of larger move
+        jump = prev_price * volatility * volatility_multiplier * np.random.uniform(-2, 2, len(symbols))
+        new_price += np.where(large_move, jump, 0.0)
         
         # Ensure price stays within reasonable bounds
         max_change = prev_price * 0.05  # 5% maximum change
-        if abs(new_price - prev_price) > max_change:
-            new_price = prev_price + math.copysign(max_change, new_price - prev_price)
+        new_price = np.clip(new_price, prev_price - max_change, prev_price + max_change)
         
-        return round(new_price, self._get_decimal_places(symbol))
+        return [round(float(price), self._get_decimal_places(symbol))
+                for symbol, price in zip(symbols, new_price)]
     
     def _get_decimal_places(self, symbol):
         """Get appropriate decimal places for symbol"""
-        decimal_places = {
-            'XAUUSDm': 2,
-            'EURUSD': 5,
-            'GBPUSD': 5,
-            'USDJPY': 3,
-            'BTCUSD': 0
-        }
-        return decimal_places.get(symbol, 5)
+        return DECIMAL_PLACES.get(symbol, 5)
     
     def _update_price_cache(self, symbol, price):
         """Update price cache with new price"""
-        if symbol not in self.price_cache:
-            self.price_cache[symbol] = []
+        # One lookup per table; a miss builds the entry (setdefault would
+        # construct a throwaway buffer/state on every tick)
+        buffer = self.price_cache.get(symbol)
+        if buffer is None:
+            buffer = self.price_cache[symbol] = PriceRingBuffer()
         
-        self.price_cache[symbol].append(price)
+        # Ring buffer keeps only the last PRICE_CACHE_SIZE prices
+        buffer.append(price)
         
-        # Keep only last 1000 prices
-        if len(self.price_cache[symbol]) > 1000:
-            self.price_cache[symbol] = self.price_cache[symbol][-1000:]
+        # Indicators advance by this one price instead of a full recompute
+        state = self.indicator_state.get(symbol)
+        if state is None:
+            state = self.indicator_state[symbol] = IndicatorState()
+        state.update(price)
         
         # Update price history for analysis
-        if symbol not in self.price_history:
-            self.price_history[symbol] = {
-                'timestamps': [],
-                'prices': [],
+        history = self.price_history.get(symbol)
+        if history is None:
+            history = self.price_history[symbol] = {
+                'timestamps': deque(),  # deques: the hour cutoff trims from the left
+                'prices': deque(),
                 'high': price,
                 'low': price,
                 'volume': 0
             }
         
-        self.price_history[symbol]['timestamps'].append(datetime.now())
-        self.price_history[symbol]['prices'].append(price)
-        self.price_history[symbol]['high'] = max(self.price_history[symbol]['high'], price)
-        self.price_history[symbol]['low'] = min(self.price_history[symbol]['low'], price)
-        self.price_history[symbol]['volume'] += random.randint(100, 1000)  # Simulated volume
+        # Monotonic seconds - only used for the age cutoff below
+        now = time.monotonic()
+        timestamps = history['timestamps']
+        prices = history['prices']
+        timestamps.append(now)
+        prices.append(price)
+        if price > history['high']:
+            history['high'] = price
+        if price < history['low']:
+            history['low'] = price
+        history['volume'] += random.randint(100, 1000)  # Simulated volume
         
         # Keep only last hour of data
-        cutoff_time = datetime.now() - timedelta(hours=1)
-        while (self.price_history[symbol]['timestamps'] and 
-               self.price_history[symbol]['timestamps'][0] < cutoff_time):
-            self.price_history[symbol]['timestamps'].pop(0)
-            self.price_history[symbol]['prices'].pop(0)
+        cutoff_time = now - PRICE_HISTORY_SECONDS
+        while timestamps and timestamps[0] < cutoff_time:
+            timestamps.popleft()
+            prices.popleft()
     
     def get_current_price(self, symbol):
         """Get current price for symbol"""
-        if symbol in self.price_cache and len(self.price_cache[symbol]) > 0:
-            return self.price_cache[symbol][-1]
+        buffer = self.price_cache.get(symbol)
+        if buffer:
+            return buffer.last()
         return None
     
+    def get_tick_count(self, symbol):
+        """Number of prices received for symbol since the feed started"""
+        state = self.indicator_state.get(symbol)
+        return state.count if state else 0
+    
     def get_price_history(self, symbol, periods=100):
         """Get price history for symbol"""
-        if symbol in self.price_cache:
-            history = self.price_cache[symbol][-periods:]
-            return np.array(history) if history else np.array([])
+        buffer = self.price_cache.get(symbol)
+        if buffer is not None:
+            return buffer.view(periods)
         return np.array([])
     
     def get_market_data(self, symbol):
         """Get comprehensive market data"""
-        if symbol not in self.price_history:
+        history = self.price_history.get(symbol)
+        if history is None:
             return None
         
-        history = self.price_history[symbol]
         current_price = self.get_current_price(symbol)
         
         if not current_price or len(history['prices']) < 2:
             return None
         
-        prices = np.array(history['prices'][-100:])  # Last 100 prices
+        # Last 100 prices as a contiguous float64 view of the tick buffer
+        prices = self.price_cache[symbol].view(100)
         
         # Calculate OHLC for last period
         if len(prices) >= 20:
             recent_prices = prices[-20:]
+            low, high = window_range(recent_prices)
             ohlc = {
                 'open': recent_prices[0],
-                'high': np.max(recent_prices),
-                'low': np.min(recent_prices),
+                'high': high,
+                'low': low,
                 'close': recent_prices[-1]
             }
         else:
@@ -223,9 +352,11 @@ class AdvancedMarketDataProvider:
                 'close': current_price
             }
         
-        # Calculate technical indicators
-        sma_20 = np.mean(prices[-20:]) if len(prices) >= 20 else current_price
-        sma_50 = np.mean(prices[-50:]) if len(prices) >= 50 else current_price
+        # Moving averages from the running window sums (the 20-period SMA is
+        # the Bollinger middle band)
+        values = self.indicator_state[symbol].values
+        sma_20 = values[8] if len(prices) >= 20 else current_price
+        sma_50 = values[10] if len(prices) >= 50 else current_price
         
         # Calculate volatility
         if len(prices) >= 20:
@@ -240,6 +371,23 @@ class AdvancedMarketDataProvider:
         else:
             momentum = 0
         
+    def _fetch_with_backoff(self, symbol):
+        """Fetch a real price unless the symbol's API is backing off after failures"""
+        retry_at, failures = self._fetch_backoff.get(symbol, (0.0, 0))
+        now = time.monotonic()
+        if now < retry_at:
+            return None
+        
+        price = self._fetch_real_price(symbol)
+        if price:
+            self._fetch_backoff.pop(symbol, None)
+        else:
+            # Exponential backoff: 2s, 4s, 8s ... capped at REAL_PRICE_MAX_BACKOFF
+            failures += 1
+            delay = min(2.0 ** failures, REAL_PRICE_MAX_BACKOFF)
+            self._fetch_backoff[symbol] = (now + delay, failures)
+        return price
+    
     def _fetch_real_price(self, symbol):
         """Fetch real price from APIs"""
         try:
@@ -256,14 +404,37 @@ class AdvancedMarketDataProvider:
             print(f"⚠️ Real price fetch failed for {symbol}: {e}")
             return None
     
+    def _get_json(self, url):
+        """GET a JSON API, reusing the cached body when the server answers 304"""
+        cached = self._response_cache.get(url)
+        headers = {}
+        if cached:
+            etag, last_modified, _ = cached
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+        
+        response = self._http.get(url, headers=headers, timeout=2)
+        if response.status_code == 304 and cached:
+            return cached[2]
+        if response.status_code != 200:
+            return None
+        
+        data = response.json()
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if etag or last_modified:
+            self._response_cache[url] = (etag, last_modified, data)
+        return data
+    
     def _fetch_gold_price(self):
         """Fetch real gold price"""
         try:
-            response = requests.get('https://api.metals.live/v1/spot/gold', timeout=2)
-            if response.status_code == 200:
-                data = response.json()
+            data = self._get_json('https://api.metals.live/v1/spot/gold')
+            if data is not None:
                 return float(data.get('price', 0))
-        except:
+        except (requests.RequestException, ValueError, KeyError, TypeError):
             pass
         return None
     
@@ -274,11 +445,10 @@ class AdvancedMarketDataProvider:
             base_currency = symbol[:3]
             quote_currency = symbol[3:]
             url = f'https://api.exchangerate-api.com/v4/latest/{base_currency}'
-            response = requests.get(url, timeout=2)
-            if response.status_code == 200:
-                data = response.json()
+            data = self._get_json(url)
+            if data is not None:
                 return float(data['rates'].get(quote_currency, 0))
-        except:
+        except (requests.RequestException, ValueError, KeyError, TypeError):
             pass
         return None
     
@@ -287,11 +457,10 @@ class AdvancedMarketDataProvider:
         try:
             # Using CoinGecko API (free)
             url = f'https://api.coingecko.com/api/v3/simple/price?ids=bitcoin&vs_currencies=usd'
-            response = requests.get(url, timeout=2)
-            if response.status_code == 200:
-                data = response.json()
+            data = self._get_json(url)
+            if data is not None:
                 return float(data['bitcoin']['usd'])
-        except:
+        except (requests.RequestException, ValueError, KeyError, TypeError):
             pass
         return None
     
@@ -303,14 +472,22 @@ class AdvancedMarketDataProvider:
         return data
     
     def get_price_feed_status(self):
-        """Get current price feed status"""
-        return {
+        """Get current price feed status (rebuilt only after a new update pass)"""
+        key = (self._feed_pass, self.running)
+        cached_key, status = self._feed_status
+        if cached_key == key:
+            return status
+        
+        last_update = self._last_update
+        status = {
             'running': self.running,
             'source': getattr(self, 'current_source', 'simulation'),
             'symbols_count': len(self.symbols),
             'cache_size': sum(len(prices) for prices in self.price_cache.values()),
-            'last_update': datetime.now().isoformat()
+            'last_update': datetime.fromtimestamp(last_update).isoformat() if last_update else None
         }
+        self._feed_status = (key, status)
+        return status
 
         return {
             'symbol': symbol,
@@ -331,37 +508,23 @@ class AdvancedMarketDataProvider:
     
     def calculate_technical_indicators(self, symbol, periods=100):
         """Calculate advanced technical indicators"""
-        prices = self.get_price_history(symbol, periods)
+        state = self.indicator_state.get(symbol)
         
-        if len(prices) < 20:
+        if state is None or min(state.count, periods) < 20:
             return {}
         
-        # Moving Averages
-        sma_8 = np.mean(prices[-8:])
-        sma_21 = np.mean(prices[-21:])
-        sma_55 = np.mean(prices[-55:]) if len(prices) >= 55 else sma_21
-        
-        # Exponential Moving Averages
-        ema_12 = self._calculate_ema(prices, 12)
-        ema_26 = self._calculate_ema(prices, 26)
+        # Running values maintained tick by tick in _update_price_cache
+        (sma_8, sma_21, sma_55, ema_12, ema_26, rsi,
+         bb_upper, bb_lower, bb_middle, atr, _) = state.values
         
-        # RSI
-        rsi = self._calculate_rsi(prices, 14)
+        # Stochastic
+        stoch_k, stoch_d = self._calculate_stochastic(self.get_price_history(symbol, 14), 14, 3)
         
         # MACD
         macd_line = ema_12 - ema_26
         macd_signal = self._calculate_ema([macd_line], 9)
         macd_histogram = macd_line - macd_signal
         
-        # Bollinger Bands
-        bb_upper, bb_lower, bb_middle = self._calculate_bollinger_bands(prices, 20, 2)
-        
-        # Stochastic
-        stoch_k, stoch_d = self._calculate_stochastic(prices, 14, 3)
-        
-        # Average True Range
-        atr = self._calculate_atr(prices, 14)
-        
         return {
             'sma_8': sma_8,
             'sma_21': sma_21,
@@ -393,48 +556,12 @@ class AdvancedMarketDataProvider:
         
         return ema
     
-    def _calculate_rsi(self, prices, period=14):
-        """Calculate Relative Strength Index"""
-        if len(prices) < period + 1:
-            return 50
-        
-        deltas = np.diff(prices)
-        gains = np.where(deltas > 0, deltas, 0)
-        losses = np.where(deltas < 0, -deltas, 0)
-        
-        avg_gain = np.mean(gains[:period])
-        avg_loss = np.mean(losses[:period])
-        
-        if avg_loss == 0:
-            return 100
-        
-        rs = avg_gain / avg_loss
-        rsi = 100 - (100 / (1 + rs))
-        
-        return rsi
-    
-    def _calculate_bollinger_bands(self, prices, period=20, std_dev=2):
-        """Calculate Bollinger Bands"""
-        if len(prices) < period:
-            current_price = prices[-1]
-            return current_price, current_price, current_price
-        
-        sma = np.mean(prices[-period:])
-        std = np.std(prices[-period:])
-        
-        upper_band = sma + (std * std_dev)
-        lower_band = sma - (std * std_dev)
-        
-        return upper_band, lower_band, sma
-    
     def _calculate_stochastic(self, prices, k_period=14, d_period=3):
         """Calculate Stochastic Oscillator"""
         if len(prices) < k_period:
             return 50, 50
         
-        recent_prices = prices[-k_period:]
-        lowest_low = np.min(recent_prices)
-        highest_high = np.max(recent_prices)
+        lowest_low, highest_high = window_range(prices[-k_period:])
         
         if highest_high == lowest_low:
             stoch_k = 50
@@ -445,19 +572,6 @@ class AdvancedMarketDataProvider:
         stoch_d = stoch_k  # Simplified
         
         return stoch_k, stoch_d
-    
-    def _calculate_atr(self, prices, period=14):
-        """Calculate Average True Range"""
-        if len(prices) < period + 1:
-            return 0.001
-        
-        # Simplified ATR calculation using price differences
-        ranges = []
-        for i in range(1, len(prices)):
-            true_range = abs(prices[i] - prices[i-1])
-            ranges.append(true_range)
-        
-        return np.mean(ranges[-period:])
 
 # Global market data provider instance
 market_data_provider = AdvancedMarketDataProvider()
\ No newline at end of file
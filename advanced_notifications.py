@@ -5,7 +5,7 @@ Real-time trading notifications via Telegram and WhatsApp
 
 import os
 import requests
-import json
+from requests.adapters import HTTPAdapter
 from datetime import datetime
 try:
     from twilio.rest import Client
@@ -14,8 +14,25 @@ except ImportError:
     TWILIO_AVAILABLE = False
     print("⚠️ Twilio not available - WhatsApp notifications disabled")
 import threading
+import itertools
+import queue
 import time
 
+# Queue ordering for notification priorities (lower sends first)
+PRIORITY_ORDER = {'high': 0, 'medium': 1, 'low': 2}
+
+# Minimum seconds between sends, so a burst of alerts stays under
+# Telegram's per-chat rate limit
+NOTIFICATION_MIN_INTERVAL = 2.0
+
+# Alert type -> leading emoji for send_alert
+ALERT_EMOJIS = {
+    'info': 'ℹ️',
+    'warning': '⚠️',
+    'error': '❌',
+    'success': '✅'
+}
+
 class AdvancedNotificationManager:
     def __init__(self):
         """Initialize notification system with multiple channels"""
@@ -45,9 +62,14 @@ class AdvancedNotificationManager:
         # Check Telegram availability
         self.telegram_enabled = bool(self.telegram_token and self.telegram_chat_id)
         
-        # Notification queue for batch sending
-        self.notification_queue = []
-        self.queue_lock = threading.Lock()
+        # Persistent HTTP session - keeps the TLS connection to Telegram alive
+        self._http = requests.Session()
+        self._http.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        
+        # Notification queue drained by a single sender thread, ordered by
+        # priority then arrival so slow channels never block the caller
+        self.notification_queue = queue.PriorityQueue()
+        self._queue_seq = itertools.count()
         
         # Start notification processor
         self.processor_thread = threading.Thread(target=self._process_notifications, daemon=True)
@@ -122,14 +144,7 @@ class AdvancedNotificationManager:
     
     def send_alert(self, alert_message, alert_type='info'):
         """Send general alert"""
-        emoji_map = {
-            'info': 'ℹ️',
-            'warning': '⚠️',
-            'error': '❌',
-            'success': '✅'
-        }
-        
-        emoji = emoji_map.get(alert_type, 'ℹ️')
+        emoji = ALERT_EMOJIS.get(alert_type, 'ℹ️')
         
         message = f"""{emoji} TRADING ALERT
 
@@ -159,29 +174,24 @@ class AdvancedNotificationManager:
     
     def _queue_notification(self, message, priority='medium'):
         """Add notification to queue"""
-        with self.queue_lock:
-            self.notification_queue.append({
-                'message': message,
-                'priority': priority,
-                'timestamp': datetime.now()
-            })
+        rank = PRIORITY_ORDER.get(priority, 1)
+        self.notification_queue.put((rank, next(self._queue_seq), message))
     
     def _process_notifications(self):
         """Process notification queue"""
+        last_sent = 0.0
         while True:
             try:
-                with self.queue_lock:
-                    if self.notification_queue:
-                        # Sort by priority (high, medium, low)
-                        priority_order = {'high': 0, 'medium': 1, 'low': 2}
-                        self.notification_queue.sort(key=lambda x: priority_order.get(x['priority'], 1))
-                        
-                        notification = self.notification_queue.pop(0)
-                        
-                        # Send notification
-                        self._send_to_all_channels(notification['message'])
+                # Wait out the send interval before taking the next message,
+                # so anything more urgent queued meanwhile still goes first
+                wait = last_sent + NOTIFICATION_MIN_INTERVAL - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
                 
-                time.sleep(2)  # Process every 2 seconds
+                # Block until a notification arrives (high, medium, low order)
+                _, _, message = self.notification_queue.get()
+                last_sent = time.monotonic()
+                self._send_to_all_channels(message)
                 
             except Exception as e:
                 print(f"Notification processing error: {e}")
@@ -207,7 +217,7 @@ class AdvancedNotificationManager:
                 'parse_mode': 'HTML'
             }
             
-            response = requests.post(url, data=data, timeout=10)
+            response = self._http.post(url, data=data, timeout=10)
             
             if response.status_code == 200:
                 print("✅ Telegram notification sent")
@@ -246,6 +256,7 @@ Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 
 #Test #TradingBot"""
         
+        # Explicit user test - send now so the result reflects a real attempt
         print("🧪 Testing notification channels...")
         self._send_to_all_channels(test_message)
         
@@ -7,36 +7,26 @@
 🔧 Real Money Optimized
 """
 
+import atexit
+import functools
 import time
 import datetime
 import numpy as np
 import threading
+import queue
+from collections import deque
+from itertools import islice
 import tkinter as tk
 import tkinter.ttk as ttk
 from tkinter.scrolledtext import ScrolledText
-import tkinter.messagebox as messagebox
-import requests
-import csv
 import os
-import json
-import sys
 import random
-from scipy import stats
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import StandardScaler
 
 # Import enhanced modules
-try:
-    from config import config
-except ImportError:
-    # Create basic config if not available
-    class BasicConfig:
-        MT5_MAGIC_NUMBER = 123456
-        MT5_DEVIATION = 10
-    config = BasicConfig()
-
+from config import config
 from hft_risk_manager import HFTRiskManager
 from advanced_market_data import market_data_provider
+from indicators import difference_scales, warmup, window_mean, window_std
 from advanced_notifications import notification_manager
 
 # MetaTrader5 integration with fallback
@@ -47,6 +37,139 @@ except ImportError:
     MT5_AVAILABLE = False
     print("⚠️ MetaTrader5 not available - running in simulation mode")
 
+# Trade journal written by log_trade_details
+TRADE_LOG_FILE = 'trade_log.csv'
+TRADE_LOG_HEADER = ('timestamp,symbol,action,entry_price,tp_price,sl_price,'
+                    'lot_size,confidence,mode,risk_reward_ratio\n')
+
+# Seconds an MT5 symbol specification is reused before re-querying
+SYMBOL_INFO_TTL = 300
+
+# Minimum price history required by AdvancedMarketAnalyzer
+MIN_ANALYSIS_PERIODS = 30
+
+# GUI log draining: interval between drains and max lines per drain
+UI_DRAIN_INTERVAL_MS = 100
+UI_DRAIN_BATCH = 200
+
+# Status panel refresh period while trading
+GUI_REFRESH_INTERVAL_MS = 1000
+
+# MT5 snapshot polling: refresh period and the age after which readers
+# fall back to a direct terminal call
+MT5_SNAPSHOT_INTERVAL = 0.25
+MT5_SNAPSHOT_MAX_AGE = 1.0
+
+# Signals kept by IntelligentSignalProcessor, and how many of the latest
+# feed the recent-accuracy confidence adjustment
+SIGNAL_HISTORY_SIZE = 100
+SIGNAL_ACCURACY_WINDOW = 20
+
+# Longest single wait while the risk manager is cooling down, so a mode
+# change made during the cooldown is still picked up promptly
+COOLDOWN_RECHECK_SECONDS = 60
+
+# Repeat clicks on heavy buttons within this many seconds of the action
+# finishing are dropped (double-clicks, clicks queued while Tk was blocked)
+CLICK_DEBOUNCE_SECONDS = 0.25
+
+# Entry fields on the trading tab: (key, label, variable type, default, width).
+# Numeric fields use DoubleVar so Tcl hands back floats directly.
+PARAM_FIELDS = (
+    ('symbol', 'Symbol:', tk.StringVar, 'XAUUSDm', 15),
+    ('lot', 'Lot Size:', tk.DoubleVar, 0.01, 10),
+)
+RISK_FIELDS = (
+    ('max_risk', 'Max Risk per Trade (%):', tk.DoubleVar, 0.5, 10),
+    ('max_drawdown', 'Max Drawdown (%):', tk.DoubleVar, 3.0, 10),
+    ('profit_target', 'Daily Profit Target (%):', tk.DoubleVar, 5.0, 10),
+)
+
+# How each trading parameter is parsed: key -> (cast, minimum or None).
+# Covers both PARAM_FIELDS and RISK_FIELDS.
+PARAM_SPEC = {
+    'symbol': (str, None),
+    'lot': (float, 0.01),
+    'max_risk': (float, 0.0),
+    'max_drawdown': (float, 0.0),
+    'profit_target': (float, 0.0),
+}
+
+# Trading parameters per mode, fixed for the life of the process
+MODE_SETTINGS = {
+    'CONSERVATIVE': {
+        'interval': 30,
+        'min_confidence': 0.8,
+        'max_risk_pct': 0.3,
+        'tp_pct': 0.5,
+        'sl_pct': 1.5
+    },
+    'BALANCED': {
+        'interval': 10,
+        'min_confidence': 0.6,
+        'max_risk_pct': 0.5,
+        'tp_pct': 1.0,
+        'sl_pct': 2.0
+    },
+    'AGGRESSIVE': {
+        'interval': 5,
+        'min_confidence': 0.4,
+        'max_risk_pct': 1.0,
+        'tp_pct': 2.0,
+        'sl_pct': 3.0
+    },
+    'ULTRA_HFT': {
+        'interval': 1,
+        'min_confidence': 0.7,
+        'max_risk_pct': 0.2,
+        'tp_pct': 0.3,
+        'sl_pct': 1.0
+    }
+}
+
+# Signal confluence IntelligentSignalProcessor requires, by mode name
+MIN_SIGNALS_REQUIRED = {
+    'CONSERVATIVE': 5,
+    'BALANCED': 4,
+    'AGGRESSIVE': 3,
+    'ULTRA_HFT': 6
+}
+
+def _slope_weights(n):
+    """Weights whose dot product with n prices is their least-squares slope"""
+    x = np.arange(n, dtype=np.float64)
+    x -= x.mean()
+    return x / np.dot(x, x)
+
+# Trend-line slope weights for the short/medium/long windows
+SLOPE_WEIGHTS = {n: _slope_weights(n) for n in (10, 20, 50)}
+
+@functools.lru_cache(maxsize=32)
+def _log_lag_slope_weights(max_lag):
+    """Weights giving the least-squares slope against log(lag), lag = 2..max_lag-1"""
+    x = np.log(np.arange(2, max_lag, dtype=np.float64))
+    x -= x.mean()
+    return x / np.dot(x, x)
+
+def _ma_trend_score(mask):
+    """Trend score for one set of MA comparison bits.
+    
+    Bits 0-3: sma_8 > sma_21, sma_21 > sma_55, price > sma_8, price > sma_21
+    Bits 4-7: the same comparisons with <
+    """
+    if mask & 0x07 == 0x07:
+        return 1.0  # Strong uptrend
+    if mask & 0x70 == 0x70:
+        return -1.0  # Strong downtrend
+    if mask & 0x09 == 0x09:
+        return 0.6  # Moderate uptrend
+    if mask & 0x90 == 0x90:
+        return -0.6  # Moderate downtrend
+    return 0
+
+# MA trend score for every combination of the eight comparison bits
+MA_TREND_SCORES = tuple(_ma_trend_score(mask) for mask in range(256))
+
 class AdvancedTradingEngine:
     def __init__(self):
         """Initialize advanced trading engine with deep analysis"""
@@ -66,12 +189,19 @@ class AdvancedTradingEngine:
         self.AGGRESSIVE_MODE = "AGGRESSIVE"
         self.ULTRA_HFT_MODE = "ULTRA_HFT"
         self.current_mode = self.BALANCED_MODE
+        self._tpsl = self._build_tpsl(self.get_mode_settings())
         
         # Advanced state tracking
         self.running = False
+        self._stop_event = threading.Event()  # Wakes the trading loop on stop
         self.mt5_connected = False
         self.initial_balance = None
         self.session_start_time = None
+        self.debug = False  # Emit "debug" level log lines
+        self._last_risk_block = None
+        self._last_analyzed_tick = None  # (symbol, tick count) of the last analysis
+        self._gui_refresh_job = None
+        self._last_click = {}  # Button action -> monotonic time it last finished
         self.price_cache = {}
         self.analysis_cache = {}
         self.performance_metrics = {}
@@ -87,10 +217,35 @@ class AdvancedTradingEngine:
         
         # Machine learning components
         self.ml_model = None
-        self.scaler = StandardScaler()
+        self.scaler = None
         self.prediction_accuracy = 0
         self.feature_history = []
         
+        # Compile the fractal-dimension kernel in the background now, so the
+        # first analysis pass never waits on the JIT
+        threading.Thread(target=warmup, daemon=True).start()
+        
+        # Log lines produced by worker threads, drained on the Tk thread
+        self._ui_queue = queue.Queue()
+        
+        # MT5 symbol specifications: symbol -> (fetched_at, symbol_info)
+        self._symbol_info_cache = {}
+        
+        # Latest (monotonic time, account_info, symbol, tick) from the MT5 poller
+        self._mt5_snapshot = None
+        # The MT5 binding shares one IPC channel with the terminal and is not
+        # thread-safe - the poller, trading and Tk threads all hold this
+        # around every mt5.* call
+        self._mt5_lock = threading.Lock()
+        
+        # Trade log file (opened on first trade, flushed by the GUI loop).
+        # The trading thread writes it while the Tk thread and atexit flush
+        # and close it, so every use holds the lock.
+        self._trade_log_file = None
+        self._trade_log_lock = threading.Lock()
+        # Buffered rows must reach disk even if the window is never closed
+        atexit.register(self.close_trade_log)
+        
         print("✅ Advanced Trading Engine initialized successfully")
         self.setup_advanced_gui()
         
@@ -120,6 +275,9 @@ class AdvancedTradingEngine:
         self.setup_performance_analytics_tab()
         self.setup_ml_engine_tab()
         
+        # Widget updates only happen on the Tk thread
+        self.root.after(UI_DRAIN_INTERVAL_MS, self._drain_ui)
+        
     def setup_trading_control_tab(self):
         """Setup main trading control interface"""
         self.trading_frame = ttk.Frame(self.notebook)
@@ -151,31 +309,20 @@ class AdvancedTradingEngine:
         config_frame = ttk.LabelFrame(self.trading_frame, text="Trading Configuration", padding=10)
         config_frame.grid(row=1, column=0, columnspan=2, sticky="ew", padx=5, pady=5)
         
-        self.symbol_var = tk.StringVar(value="XAUUSDm")
-        self.lot_var = tk.StringVar(value="0.01")
-        
-        ttk.Label(config_frame, text="Symbol:").grid(row=0, column=0, sticky="w", padx=5)
-        ttk.Entry(config_frame, textvariable=self.symbol_var, width=15).grid(row=0, column=1, padx=5)
-        
-        ttk.Label(config_frame, text="Lot Size:").grid(row=0, column=2, sticky="w", padx=5)
-        ttk.Entry(config_frame, textvariable=self.lot_var, width=10).grid(row=0, column=3, padx=5)
+        self._param_vars = self._create_entries(config_frame, PARAM_FIELDS)
         
         # Advanced risk parameters
         risk_frame = ttk.LabelFrame(self.trading_frame, text="Advanced Risk Management", padding=10)
         risk_frame.grid(row=2, column=0, columnspan=2, sticky="ew", padx=5, pady=5)
         
-        self.max_risk_var = tk.StringVar(value="0.5")
-        self.max_drawdown_var = tk.StringVar(value="3.0")
-        self.profit_target_var = tk.StringVar(value="5.0")
-        
-        ttk.Label(risk_frame, text="Max Risk per Trade (%):").grid(row=0, column=0, sticky="w", padx=5)
-        ttk.Entry(risk_frame, textvariable=self.max_risk_var, width=10).grid(row=0, column=1, padx=5)
-        
-        ttk.Label(risk_frame, text="Max Drawdown (%):").grid(row=0, column=2, sticky="w", padx=5)
-        ttk.Entry(risk_frame, textvariable=self.max_drawdown_var, width=10).grid(row=0, column=3, padx=5)
+        self._param_vars.update(self._create_entries(risk_frame, RISK_FIELDS))
         
-        ttk.Label(risk_frame, text="Daily Profit Target (%):").grid(row=1, column=0, sticky="w", padx=5)
-        ttk.Entry(risk_frame, textvariable=self.profit_target_var, width=10).grid(row=1, column=1, padx=5)
+        # Parse trading and risk parameters only when the user edits them
+        self._params = self._read_params()
+        self._params_refresh_pending = False
+        self._params_error = None  # Last rejection reported for an edit
+        for variable in self._param_vars.values():
+            variable.trace_add("write", self._on_params_changed)
         
         # Control buttons
         control_frame = ttk.Frame(self.trading_frame)
@@ -266,7 +413,7 @@ class AdvancedTradingEngine:
         emergency_frame.grid(row=1, column=0, columnspan=2, sticky="ew", padx=5, pady=5)
         
         ttk.Button(emergency_frame, text="Close All Positions", 
-                  command=self.close_all_positions).pack(side=tk.LEFT, padx=5)
+                  command=self._debounced(self.close_all_positions)).pack(side=tk.LEFT, padx=5)
         ttk.Button(emergency_frame, text="Pause Trading", 
                   command=self.pause_trading).pack(side=tk.LEFT, padx=5)
         ttk.Button(emergency_frame, text="Reset Counters", 
@@ -314,16 +461,69 @@ class AdvancedTradingEngine:
         training_frame = ttk.LabelFrame(self.ml_frame, text="Model Training", padding=10)
         training_frame.grid(row=1, column=0, columnspan=2, sticky="ew", padx=5, pady=5)
         
-        ttk.Button(training_frame, text="Train Model", command=self.train_ml_model).pack(side=tk.LEFT, padx=5)
-        ttk.Button(training_frame, text="Retrain", command=self.retrain_model).pack(side=tk.LEFT, padx=5)
-        ttk.Button(training_frame, text="Reset Model", command=self.reset_model).pack(side=tk.LEFT, padx=5)
-        
-        # Initialize ML engine
-        self.initialize_ml_engine()
+        ttk.Button(training_frame, text="Train Model", command=self._debounced(self.train_ml_model)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(training_frame, text="Retrain", command=self._debounced(self.retrain_model)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(training_frame, text="Reset Model", command=self._debounced(self.reset_model)).pack(side=tk.LEFT, padx=5)
+        
+        # Initialize ML engine once the window is up - importing
+        # scikit-learn takes over a second
+        self.root.after_idle(self.initialize_ml_engine)
+        
+    def _create_entries(self, parent, fields):
+        """Lay out labelled entries two per row, returning {key: Tk variable}"""
+        variables = {}
+        for i, (key, label, var_type, default, width) in enumerate(fields):
+            row, column = divmod(i, 2)
+            variable = var_type(value=default)
+            ttk.Label(parent, text=label).grid(row=row, column=column * 2, sticky="w", padx=5)
+            ttk.Entry(parent, textvariable=variable, width=width).grid(row=row, column=column * 2 + 1, padx=5)
+            variables[key] = variable
+        return variables
+    
+    def _read_params(self):
+        """Parse trading parameters from the GUI (Tk thread only)"""
+        params = {}
+        for key, (cast, minimum) in PARAM_SPEC.items():
+            value = cast(self._param_vars[key].get())
+            if minimum is not None and value < minimum:
+                raise ValueError(f"{key} must be at least {minimum}")
+            params[key] = value
+        return params
+    
+    def _on_params_changed(self, *args):
+        """Schedule one parameter refresh per idle cycle, however many edits land"""
+        if self._params_refresh_pending:
+            return
+        self._params_refresh_pending = True
+        self.root.after_idle(self._refresh_params)
+    
+    def _refresh_params(self):
+        """Refresh the parameter snapshot read by the trading thread"""
+        self._params_refresh_pending = False
+        try:
+            params = self._read_params()
+        except (ValueError, tk.TclError) as e:
+            # Keep the last valid values, but say so - once per distinct
+            # error rather than on every keystroke
+            error = str(e)
+            if error != self._params_error:
+                self._params_error = error
+                self.log(f"⚠️ Parameter change not applied ({error}) - still using "
+                         f"{self._params['symbol']} at lot {self._params['lot']}", "warning")
+            return
         
+        self._params = params
+        if self._params_error is not None:
+            self._params_error = None
+            self.log(f"✅ Parameters applied: {params['symbol']} at lot {params['lot']}", "info")
+    
     def initialize_ml_engine(self):
         """Initialize machine learning engine"""
         try:
+            from sklearn.ensemble import RandomForestClassifier
+            from sklearn.preprocessing import StandardScaler
+            
+            self.scaler = StandardScaler()
             self.ml_model = RandomForestClassifier(
                 n_estimators=100,
                 max_depth=10,
@@ -343,7 +543,9 @@ class AdvancedTradingEngine:
         
         # Initialize session
         self.running = True
+        self._stop_event.clear()
         self.session_start_time = datetime.datetime.now()
+        self._tpsl = self._build_tpsl(self.get_mode_settings())
         
         # Connect to MT5 or start simulation
         self.connect_mt5()
@@ -358,15 +560,21 @@ class AdvancedTradingEngine:
         self.start_button.config(state="disabled")
         self.stop_button.config(state="normal")
         
+        # Poll MT5 in the background so the trading loop reads a ready snapshot
+        if self.mt5_connected:
+            self.mt5_snapshot_thread = threading.Thread(target=self._mt5_snapshot_loop)
+            self.mt5_snapshot_thread.daemon = True
+            self.mt5_snapshot_thread.start()
+        
         # Start trading thread
         self.trading_thread = threading.Thread(target=self.advanced_trading_loop)
         self.trading_thread.daemon = True
         self.trading_thread.start()
         
-        # Start GUI update thread
-        self.gui_update_thread = threading.Thread(target=self.gui_update_loop)
-        self.gui_update_thread.daemon = True
-        self.gui_update_thread.start()
+        # Refresh status panels on the Tk thread
+        if self._gui_refresh_job is not None:
+            self.root.after_cancel(self._gui_refresh_job)
+        self._gui_refresh_job = self.root.after(GUI_REFRESH_INTERVAL_MS, self.gui_update_loop)
         
         self.log("🚀 Advanced Trading Engine Started", "success")
         
@@ -380,8 +588,28 @@ class AdvancedTradingEngine:
                 mode_settings = self.get_mode_settings()
                 interval = mode_settings['interval']
                 
+                # Fixed cadence - analysis time counts against the interval
+                deadline = time.monotonic() + interval
+                
+                # A risk-manager cooldown has a known end - sleep through it
+                # in one wait instead of re-analysing and rejecting every tick
+                if self.current_mode == self.ULTRA_HFT_MODE:
+                    cooldown = self.risk_manager.cooldown_remaining()
+                    if cooldown > 0:
+                        self.log(f"🛡️ Risk Manager cooldown - resuming in {cooldown / 60:.1f} min", "warning")
+                        self._stop_event.wait(min(cooldown, COOLDOWN_RECHECK_SECONDS))
+                        continue
+                
+                # Nothing new since the last pass - re-analysing the same
+                # prices could only repeat the previous decision
+                symbol = self._params['symbol']
+                analyzed_tick = (symbol, self.market_data.get_tick_count(symbol))
+                if analyzed_tick == self._last_analyzed_tick:
+                    self._sleep_until(deadline)
+                    continue
+                self._last_analyzed_tick = analyzed_tick
+                
                 # Perform deep market analysis
-                symbol = self.symbol_var.get()
                 market_data = self.market_data.get_market_data(symbol)
                 technical_indicators = self.market_data.calculate_technical_indicators(symbol)
                 
@@ -390,7 +618,7 @@ class AdvancedTradingEngine:
                 )
                 
                 if not analysis_result['valid']:
-                    time.sleep(interval)
+                    self._sleep_until(deadline)
                     continue
                 
                 # Generate intelligent signal
@@ -405,9 +633,13 @@ class AdvancedTradingEngine:
                         signal.get('confidence', 0)
                     )
                     if not risk_check[0]:
-                        self.log(f"🛡️ Risk Manager: {risk_check[1]}", "warning")
-                        time.sleep(interval)
+                        # Same rejection repeats every tick - only surface changes
+                        level = "debug" if risk_check[1] == self._last_risk_block else "warning"
+                        self._last_risk_block = risk_check[1]
+                        self.log(f"🛡️ Risk Manager: {risk_check[1]}", level)
+                        self._sleep_until(deadline)
                         continue
+                    self._last_risk_block = None
                 
                 # Execute trade if signal is strong enough
                 if signal['action'] != 'HOLD' and signal['confidence'] > mode_settings['min_confidence']:
@@ -416,50 +648,25 @@ class AdvancedTradingEngine:
                 # Update performance metrics
                 self.update_performance_metrics()
                 
-                time.sleep(interval)
+                self._sleep_until(deadline)
                 
             except Exception as e:
                 self.log(f"❌ Trading loop error: {e}", "error")
-                time.sleep(5)
+                self._stop_event.wait(5)
+    
+    def _sleep_until(self, deadline):
+        """Wait for a monotonic deadline, returning early if trading stops"""
+        self._stop_event.wait(max(0.0, deadline - time.monotonic()))
     
     def get_mode_settings(self):
         """Get settings based on current trading mode"""
-        settings = {
-            self.CONSERVATIVE_MODE: {
-                'interval': 30,
-                'min_confidence': 0.8,
-                'max_risk_pct': 0.3,
-                'tp_pct': 0.5,
-                'sl_pct': 1.5
-            },
-            self.BALANCED_MODE: {
-                'interval': 10,
-                'min_confidence': 0.6,
-                'max_risk_pct': 0.5,
-                'tp_pct': 1.0,
-                'sl_pct': 2.0
-            },
-            self.AGGRESSIVE_MODE: {
-                'interval': 5,
-                'min_confidence': 0.4,
-                'max_risk_pct': 1.0,
-                'tp_pct': 2.0,
-                'sl_pct': 3.0
-            },
-            self.ULTRA_HFT_MODE: {
-                'interval': 1,
-                'min_confidence': 0.7,
-                'max_risk_pct': 0.2,
-                'tp_pct': 0.3,
-                'sl_pct': 1.0
-            }
-        }
-        return settings.get(self.current_mode, settings[self.BALANCED_MODE])
+        return MODE_SETTINGS.get(self.current_mode, MODE_SETTINGS[self.BALANCED_MODE])
     
     def execute_advanced_trade(self, signal, mode_settings):
         """Execute trade with advanced risk management"""
         try:
-            symbol = self.symbol_var.get()
+            params = self._params
+            symbol = params['symbol']
             
             if not self.mt5_connected:
                 # Log simulation trade
@@ -475,7 +682,7 @@ class AdvancedTradingEngine:
                 return
             
             # Get account info for real trading
-            account_info = mt5.account_info()
+            account_info = self.get_account_info()
             if not account_info:
                 self.log("❌ Failed to get account info", "error")
                 return
@@ -490,7 +697,7 @@ class AdvancedTradingEngine:
                 return
             
             # Calculate position size with advanced money management
-            base_lot = float(self.lot_var.get())
+            base_lot = params['lot']
             confidence_multiplier = min(signal['confidence'] * 1.5, 1.0)
             position_size = base_lot * confidence_multiplier
             
@@ -503,20 +710,10 @@ class AdvancedTradingEngine:
                 self.log(f"❌ Failed to get current price for {symbol}", "error")
                 return
             
-            # Calculate TP/SL levels
-            tp_pct = mode_settings['tp_pct']
-            sl_pct = mode_settings['sl_pct']
-            
-            # Apply volatility adjustment
-            volatility = signal.get('volatility', 0.01)
-            volatility_multiplier = 1 + (volatility * 0.5)
-            
-            if signal['action'] == 'BUY':
-                tp_price = current_price * (1 + (tp_pct / 100) * volatility_multiplier)
-                sl_price = current_price * (1 - (sl_pct / 100) * volatility_multiplier)
-            else:  # SELL
-                tp_price = current_price * (1 - (tp_pct / 100) * volatility_multiplier)
-                sl_price = current_price * (1 + (sl_pct / 100) * volatility_multiplier)
+            # Calculate TP/SL levels with the mode-specialized calculator
+            tp_price, sl_price = self._tpsl(
+                current_price, signal['action'] == 'BUY', signal.get('volatility', 0.01)
+            )
             
             # Send order to MT5
             order_result = self.send_mt5_order(
@@ -552,27 +749,49 @@ class AdvancedTradingEngine:
             self.failed_trades += 1
     
     def gui_update_loop(self):
-        """Update GUI with real-time data"""
-        while self.running:
-            try:
-                self.update_account_display()
-                self.update_analysis_display()
-                self.update_risk_display()
-                self.update_performance_display()
-                self.update_ml_display()
-                time.sleep(1)
-            except Exception as e:
-                print(f"GUI update error: {e}")
-                time.sleep(5)
+        """Update GUI with real-time data (Tk thread, reschedules itself)"""
+        self._gui_refresh_job = None
+        if not self.running:
+            return
+        
+        try:
+            self.update_account_display()
+            self.update_analysis_display()
+            self.update_risk_display()
+            self.update_performance_display()
+            self.update_ml_display()
+            self.flush_trade_log()
+        except Exception as e:
+            print(f"GUI update error: {e}")
+        
+        self._gui_refresh_job = self.root.after(GUI_REFRESH_INTERVAL_MS, self.gui_update_loop)
+    
+    def _build_tpsl(self, mode_settings):
+        """Build the TP/SL calculator for a mode - the engine's one TP/SL formula"""
+        tp_frac = mode_settings['tp_pct'] / 100
+        sl_frac = mode_settings['sl_pct'] / 100
+        
+        def tpsl(price, is_buy, volatility):
+            # Wider levels in volatile markets
+            volatility_multiplier = 1 + (volatility * 0.5)
+            tp_move = tp_frac * volatility_multiplier
+            sl_move = sl_frac * volatility_multiplier
+            if is_buy:
+                return price * (1 + tp_move), price * (1 - sl_move)
+            return price * (1 - tp_move), price * (1 + sl_move)
+        
+        return tpsl
     
     def on_mode_change(self):
         """Handle trading mode change"""
         self.current_mode = self.trading_mode_var.get()
+        self._tpsl = self._build_tpsl(self.get_mode_settings())
         self.log(f"Trading mode changed to: {self.current_mode}", "info")
     
     def stop_trading(self):
         """Stop trading engine"""
         self.running = False
+        self._stop_event.set()
         self.start_button.config(state="normal")
         self.stop_button.config(state="disabled")
         self.log("🛑 Trading stopped", "warning")
@@ -580,6 +799,7 @@ class AdvancedTradingEngine:
     def emergency_stop(self):
         """Emergency stop all trading"""
         self.running = False
+        self._stop_event.set()
         self.close_all_positions()
         self.start_button.config(state="normal")
         self.stop_button.config(state="disabled")
@@ -588,6 +808,7 @@ class AdvancedTradingEngine:
     def pause_trading(self):
         """Pause trading temporarily"""
         self.running = False
+        self._stop_event.set()
         self.log("⏸️ Trading paused", "warning")
     
     def reset_counters(self):
@@ -606,36 +827,48 @@ class AdvancedTradingEngine:
             return
         
         try:
-            positions = mt5.positions_get()
+            with self._mt5_lock:
+                positions = mt5.positions_get()
             if positions is None or len(positions) == 0:
                 self.log("No open positions to close", "info")
                 return
             
+            # Group by symbol so each symbol's closing price is fetched once
+            by_symbol = {}
             for position in positions:
-                # Create close request
-                if position.type == mt5.ORDER_TYPE_BUY:
-                    order_type = mt5.ORDER_TYPE_SELL
-                else:
-                    order_type = mt5.ORDER_TYPE_BUY
-                
-                request = {
-                    "action": mt5.TRADE_ACTION_DEAL,
-                    "symbol": position.symbol,
-                    "volume": position.volume,
-                    "type": order_type,
-                    "position": position.ticket,
-                    "deviation": 10,
-                    "magic": getattr(config, 'MT5_MAGIC_NUMBER', 123456),
-                    "comment": "Emergency close",
-                    "type_time": mt5.ORDER_TIME_GTC,
-                    "type_filling": mt5.ORDER_FILLING_IOC,
-                }
+                by_symbol.setdefault(position.symbol, []).append(position)
+            
+            # One order_send at a time - the MT5 binding shares a single IPC
+            # channel with the terminal and is not safe to call concurrently
+            for symbol, symbol_positions in by_symbol.items():
+                with self._mt5_lock:
+                    tick = mt5.symbol_info_tick(symbol)
                 
-                result = mt5.order_send(request)
-                if result.retcode == mt5.TRADE_RETCODE_DONE:
-                    self.log(f"✅ Position closed: {position.ticket}", "success")
-                else:
-                    self.log(f"❌ Failed to close position: {result.comment}", "error")
+                for position in symbol_positions:
+                    # Create close request - longs close at bid, shorts at ask
+                    if position.type == mt5.ORDER_TYPE_BUY:
+                        order_type = mt5.ORDER_TYPE_SELL
+                        price = tick.bid if tick else 0.0
+                    else:
+                        order_type = mt5.ORDER_TYPE_BUY
+                        price = tick.ask if tick else 0.0
+                    
+                    # Fixed fields come from the template built at connect time
+                    request = dict(self._close_template)
+                    request["symbol"] = symbol
+                    request["volume"] = position.volume
+                    request["type"] = order_type
+                    request["position"] = position.ticket
+                    request["price"] = price
+                    
+                    with self._mt5_lock:
+                        result = mt5.order_send(request)
+                        error = None if result else mt5.last_error()
+                    if result and result.retcode == mt5.TRADE_RETCODE_DONE:
+                        self.log(f"✅ Position closed: {position.ticket}", "success")
+                    else:
+                        comment = result.comment if result else error
+                        self.log(f"❌ Failed to close position {position.ticket}: {comment}", "error")
                     
         except Exception as e:
             self.log(f"❌ Error closing positions: {e}", "error")
@@ -658,28 +891,43 @@ class AdvancedTradingEngine:
         self.ml_model = None
         self.initialize_ml_engine()
     
+    def _debounced(self, action):
+        """Wrap a button action so repeat clicks right after it ran are ignored"""
+        def command():
+            last = self._last_click.get(action)
+            if last is not None and time.monotonic() - last < CLICK_DEBOUNCE_SECONDS:
+                return
+            action()
+            self._last_click[action] = time.monotonic()
+        return command
+    
+    def _set_status(self, var, text):
+        """Set a status StringVar only when its text changed (Tk thread only)"""
+        if var.get() != text:
+            var.set(text)
+    
     def update_account_display(self):
         """Update account information display"""
         try:
             if not self.mt5_connected:
-                self.account_status_var.set("Status: Simulation Mode")
+                self._set_status(self.account_status_var, "Status: Simulation Mode")
                 return
             
-            account_info = mt5.account_info()
+            account_info = self.get_account_info()
             if not account_info:
                 return
             
-            self.balance_var.set(f"Balance: ${account_info.balance:,.2f}")
+            self._set_status(self.balance_var, f"Balance: ${account_info.balance:,.2f}")
             profit = account_info.profit
-            self.profit_var.set(f"Today's P/L: ${profit:,.2f}")
+            self._set_status(self.profit_var, f"Today's P/L: ${profit:,.2f}")
             
             if self.total_trades > 0:
                 winrate = (self.winning_trades / self.total_trades) * 100
-                self.winrate_var.set(f"Win Rate: {winrate:.1f}%")
+                self._set_status(self.winrate_var, f"Win Rate: {winrate:.1f}%")
             
             if self.initial_balance:
                 current_dd = ((self.initial_balance - account_info.balance) / self.initial_balance) * 100
-                self.drawdown_var.set(f"Drawdown: {current_dd:.2f}%")
+                self._set_status(self.drawdown_var, f"Drawdown: {current_dd:.2f}%")
                 
         except Exception as e:
             self.log(f"Error updating account display: {e}", "error")
@@ -687,18 +935,18 @@ class AdvancedTradingEngine:
     def update_analysis_display(self):
         """Update market analysis display"""
         try:
-            symbol = self.symbol_var.get()
+            symbol = self._params['symbol']
             if symbol in self.analysis_cache:
                 analysis = self.analysis_cache[symbol]
                 
-                self.trend_strength_var.set(f"Trend Strength: {analysis.get('trend_strength', 0):.3f}")
-                self.volatility_var.set(f"Volatility: {analysis.get('volatility', 0):.3f}")
-                self.momentum_var.set(f"Momentum: {analysis.get('momentum', 0):.3f}")
+                self._set_status(self.trend_strength_var, f"Trend Strength: {analysis.get('trend_strength', 0):.3f}")
+                self._set_status(self.volatility_var, f"Volatility: {analysis.get('volatility', 0):.3f}")
+                self._set_status(self.momentum_var, f"Momentum: {analysis.get('momentum', 0):.3f}")
                 
                 sr = analysis.get('support_resistance', {})
                 support = sr.get('support', 0)
                 resistance = sr.get('resistance', 0)
-                self.support_resistance_var.set(f"S/R: {support:.5f} / {resistance:.5f}")
+                self._set_status(self.support_resistance_var, f"S/R: {support:.5f} / {resistance:.5f}")
                 
         except Exception as e:
             pass  # Silent fail for display updates
@@ -706,13 +954,15 @@ class AdvancedTradingEngine:
     def update_risk_display(self):
         """Update risk management display"""
         try:
-            risk_status = self.risk_manager.get_risk_status()
+            # Only the loss counter is shown - read it directly rather than
+            # building the full get_risk_status() summary every refresh
+            consecutive_losses = self.risk_manager.consecutive_losses
             
-            self.consecutive_losses_var.set(f"Consecutive Losses: {risk_status['consecutive_losses']}")
+            self._set_status(self.consecutive_losses_var, f"Consecutive Losses: {consecutive_losses}")
             
             if self.initial_balance:
                 exposure = (abs(self.total_profit) / self.initial_balance) * 100
-                self.risk_exposure_var.set(f"Risk Exposure: {exposure:.2f}%")
+                self._set_status(self.risk_exposure_var, f"Risk Exposure: {exposure:.2f}%")
                 
         except Exception as e:
             pass  # Silent fail for display updates
@@ -720,11 +970,11 @@ class AdvancedTradingEngine:
     def update_performance_display(self):
         """Update performance metrics display"""
         try:
-            self.total_trades_var.set(f"Total Trades: {self.total_trades}")
+            self._set_status(self.total_trades_var, f"Total Trades: {self.total_trades}")
             
             if self.total_trades > 0:
                 avg_profit = self.total_profit / self.total_trades
-                self.avg_profit_var.set(f"Average Profit: ${avg_profit:.2f}")
+                self._set_status(self.avg_profit_var, f"Average Profit: ${avg_profit:.2f}")
                 
         except Exception as e:
             pass  # Silent fail for display updates
@@ -733,16 +983,70 @@ class AdvancedTradingEngine:
         """Update ML engine display"""
         try:
             if self.prediction_accuracy > 0:
-                self.prediction_accuracy_var.set(f"Prediction Accuracy: {self.prediction_accuracy:.1f}%")
+                self._set_status(self.prediction_accuracy_var, f"Prediction Accuracy: {self.prediction_accuracy:.1f}%")
                 
         except Exception as e:
             pass  # Silent fail for display updates
     
+    def _mt5_snapshot_loop(self):
+        """Keep a fresh account/tick snapshot while trading (own thread)"""
+        last_error = None
+        while self.running and self.mt5_connected:
+            try:
+                symbol = self._params['symbol']
+                with self._mt5_lock:
+                    account_info = mt5.account_info()
+                    tick = mt5.symbol_info_tick(symbol)
+                # One tuple assignment - readers never see a mixed snapshot
+                self._mt5_snapshot = (time.monotonic(), account_info, symbol, tick)
+                last_error = None
+            except Exception as e:
+                # A persistent failure repeats every poll - only surface changes
+                error = str(e)
+                level = "debug" if error == last_error else "warning"
+                last_error = error
+                self.log(f"MT5 snapshot error: {error}", level)
+            self._stop_event.wait(MT5_SNAPSHOT_INTERVAL)
+        self._mt5_snapshot = None
+    
+    def _fresh_mt5_snapshot(self):
+        """Latest MT5 snapshot, or None when missing or stale"""
+        snapshot = self._mt5_snapshot
+        if snapshot and time.monotonic() - snapshot[0] < MT5_SNAPSHOT_MAX_AGE:
+            return snapshot
+        return None
+    
+    def get_account_info(self):
+        """MT5 account info, from the poller snapshot when fresh"""
+        snapshot = self._fresh_mt5_snapshot()
+        if snapshot and snapshot[1]:
+            return snapshot[1]
+        with self._mt5_lock:
+            return mt5.account_info()
+    
+    def get_symbol_info(self, symbol):
+        """Get MT5 symbol specification, cached for SYMBOL_INFO_TTL seconds"""
+        now = time.monotonic()
+        cached = self._symbol_info_cache.get(symbol)
+        if cached and now - cached[0] < SYMBOL_INFO_TTL:
+            return cached[1]
+        
+        with self._mt5_lock:
+            symbol_info = mt5.symbol_info(symbol)
+        if symbol_info:
+            self._symbol_info_cache[symbol] = (now, symbol_info)
+        return symbol_info
+    
     def get_current_price(self, symbol):
         """Get current price for symbol"""
         if self.mt5_connected:
             try:
-                tick = mt5.symbol_info_tick(symbol)
+                snapshot = self._fresh_mt5_snapshot()
+                if snapshot and snapshot[2] == symbol and snapshot[3]:
+                    tick = snapshot[3]
+                else:
+                    with self._mt5_lock:
+                        tick = mt5.symbol_info_tick(symbol)
                 if tick:
                     return (tick.bid + tick.ask) / 2
             except Exception as e:
@@ -751,25 +1055,6 @@ class AdvancedTradingEngine:
         # Fallback to market data provider
         return self.market_data.get_current_price(symbol)
     
-    def calculate_advanced_tpsl(self, entry_price, action, mode_settings, volatility):
-        """Calculate advanced TP/SL levels"""
-        tp_pct = mode_settings['tp_pct']
-        sl_pct = mode_settings['sl_pct']
-        
-        # Adjust for volatility
-        volatility_multiplier = 1 + (volatility * 0.5)
-        tp_distance = entry_price * (tp_pct / 100) * volatility_multiplier
-        sl_distance = entry_price * (sl_pct / 100) * volatility_multiplier
-        
-        if action == 'BUY':
-            tp_price = entry_price + tp_distance
-            sl_price = entry_price - sl_distance
-        else:  # SELL
-            tp_price = entry_price - tp_distance
-            sl_price = entry_price + sl_distance
-        
-        return tp_price, sl_price
-    
     def send_mt5_order(self, action, symbol, lot_size, price, tp_price, sl_price):
         """Send order to MT5 with comprehensive error handling"""
         if not self.mt5_connected:
@@ -777,16 +1062,20 @@ class AdvancedTradingEngine:
         
         try:
             # Verify symbol is available
-            symbol_info = mt5.symbol_info(symbol)
+            symbol_info = self.get_symbol_info(symbol)
             if not symbol_info:
                 self.log(f"❌ Symbol {symbol} not found", "error")
                 return False
             
             if not symbol_info.visible:
                 # Try to enable symbol
-                if not mt5.symbol_select(symbol, True):
+                with self._mt5_lock:
+                    selected = mt5.symbol_select(symbol, True)
+                if not selected:
                     self.log(f"❌ Failed to enable symbol {symbol}", "error")
                     return False
+                # Cached entry still says invisible - refetch on next order
+                self._symbol_info_cache.pop(symbol, None)
             
             # Prepare order request
             order_type = mt5.ORDER_TYPE_BUY if action == 'BUY' else mt5.ORDER_TYPE_SELL
@@ -821,23 +1110,20 @@ class AdvancedTradingEngine:
             lot_size = round(lot_size / lot_step) * lot_step
             lot_size = max(lot_min, min(lot_max, lot_size))
             
-            request = {
-                "action": mt5.TRADE_ACTION_DEAL,
-                "symbol": symbol,
-                "volume": lot_size,
-                "type": order_type,
-                "price": price,
-                "tp": tp_price,
-                "sl": sl_price,
-                "deviation": 20,  # Allow more slippage for volatile markets
-                "magic": getattr(config, 'MT5_MAGIC_NUMBER', 123456),
-                "comment": f"AdvancedEngine-{self.current_mode}",
-                "type_time": mt5.ORDER_TIME_GTC,
-                "type_filling": mt5.ORDER_FILLING_IOC,
-            }
+            # Copy the connect-time template so the per-order fields never
+            # leak into the shared dict
+            request = dict(self._order_template)
+            request["symbol"] = symbol
+            request["volume"] = lot_size
+            request["type"] = order_type
+            request["price"] = price
+            request["tp"] = tp_price
+            request["sl"] = sl_price
+            request["comment"] = f"AdvancedEngine-{self.current_mode}"
             
             # Send order
-            result = mt5.order_send(request)
+            with self._mt5_lock:
+                result = mt5.order_send(request)
             
             if result.retcode == mt5.TRADE_RETCODE_DONE:
                 self.log(f"✅ Order executed successfully - Ticket: {result.order}", "success")
@@ -879,57 +1165,89 @@ class AdvancedTradingEngine:
     
     def log(self, message, level="info"):
         """Enhanced logging system"""
-        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+        if level == "debug" and not self.debug:
+            return
+        
+        # time.strftime formats the local clock directly - no datetime object per line
+        timestamp = time.strftime("%H:%M:%S")
         log_entry = f"[{timestamp}] {message}"
         
-        # Color coding for different levels
-        if hasattr(self, 'trade_history_text'):
-            self.trade_history_text.insert(tk.END, log_entry + "\n")
-            self.trade_history_text.see(tk.END)
+        # Widgets are not thread-safe - hand the line to the Tk thread
+        self._ui_queue.put(log_entry)
         
         print(log_entry)
     
+    def _drain_ui(self):
+        """Flush queued log lines into the history widget (Tk thread only)"""
+        batch = []
+        try:
+            while len(batch) < UI_DRAIN_BATCH:
+                batch.append(self._ui_queue.get_nowait())
+        except queue.Empty:
+            pass
+        
+        if batch:
+            self.trade_history_text.insert(tk.END, "\n".join(batch) + "\n")
+            self.trade_history_text.see(tk.END)
+        
+        self.root.after(UI_DRAIN_INTERVAL_MS, self._drain_ui)
+    
     def log_trade_details(self, signal, entry_price, tp_price, sl_price, lot_size):
         """Log detailed trade information for analysis"""
-        trade_details = {
-            'timestamp': datetime.datetime.now().isoformat(),
-            'symbol': self.symbol_var.get(),
-            'action': signal['action'],
-            'entry_price': entry_price,
-            'tp_price': tp_price,
-            'sl_price': sl_price,
-            'lot_size': lot_size,
-            'confidence': signal['confidence'],
-            'mode': self.current_mode,
-            'risk_reward_ratio': abs(tp_price - entry_price) / abs(entry_price - sl_price)
-        }
+        risk_reward_ratio = abs(tp_price - entry_price) / abs(entry_price - sl_price)
+        
+        # Columns are numbers and plain identifiers, so no CSV quoting is needed
+        row = (
+            f"{datetime.datetime.now().isoformat()},{self._params['symbol']},{signal['action']},"
+            f"{entry_price},{tp_price},{sl_price},{lot_size},"
+            f"{signal['confidence']},{self.current_mode},{risk_reward_ratio}\n"
+        )
         
         # Save to CSV for analysis
         try:
-            import csv
-            import os
-            
-            file_exists = os.path.exists('trade_log.csv')
-            with open('trade_log.csv', 'a', newline='') as csvfile:
-                fieldnames = trade_details.keys()
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                
-                if not file_exists:
-                    writer.writeheader()
+            with self._trade_log_lock:
+                if self._trade_log_file is None:
+                    # Keep one buffered handle open for the session instead of
+                    # reopening the file for every trade
+                    self._trade_log_file = open(TRADE_LOG_FILE, 'a', newline='', buffering=1 << 16)
+                    if os.fstat(self._trade_log_file.fileno()).st_size == 0:
+                        self._trade_log_file.write(TRADE_LOG_HEADER)
                 
-                writer.writerow(trade_details)
+                self._trade_log_file.write(row)
                 
-        except Exception as e:
+        except (OSError, ValueError) as e:  # ValueError: handle already closed
             self.log(f"Warning: Could not save trade log: {e}", "warning")
     
+    def flush_trade_log(self):
+        """Flush buffered trade log rows to disk"""
+        try:
+            with self._trade_log_lock:
+                if self._trade_log_file is not None:
+                    self._trade_log_file.flush()
+        except (OSError, ValueError) as e:
+            self.log(f"Warning: Could not flush trade log: {e}", "warning")
+    
+    def close_trade_log(self):
+        """Flush and close the trade log file"""
+        with self._trade_log_lock:
+            if self._trade_log_file is not None:
+                try:
+                    self._trade_log_file.close()
+                except OSError as e:
+                    print(f"⚠️ Could not close trade log: {e}")
+                self._trade_log_file = None
+    
     def stop_trading(self):
         """Stop trading engine and cleanup"""
         self.running = False
+        self._stop_event.set()
         
         # Stop market data feed
         if hasattr(self, 'market_data'):
             self.market_data.stop_data_feed()
         
+        self.flush_trade_log()
+        
         # Update GUI
         if hasattr(self, 'start_button'):
             self.start_button.config(state="normal")
@@ -966,10 +1284,27 @@ class AdvancedTradingEngine:
         
         try:
             # Try to connect to MT5
-            if mt5.initialize():
+            with self._mt5_lock:
+                initialized = mt5.initialize()
                 # Test connection with account info
-                account_info = mt5.account_info()
+                account_info = mt5.account_info() if initialized else None
+            if initialized:
                 if account_info:
+                    self._order_template = {
+                        "action": mt5.TRADE_ACTION_DEAL,
+                        "deviation": 20,  # Allow more slippage for volatile markets
+                        "magic": config.MT5_MAGIC_NUMBER,
+                        "type_time": mt5.ORDER_TIME_GTC,
+                        "type_filling": mt5.ORDER_FILLING_IOC,
+                    }
+                    self._close_template = {
+                        "action": mt5.TRADE_ACTION_DEAL,
+                        "deviation": 10,
+                        "magic": config.MT5_MAGIC_NUMBER,
+                        "comment": "Emergency close",
+                        "type_time": mt5.ORDER_TIME_GTC,
+                        "type_filling": mt5.ORDER_FILLING_IOC,
+                    }
                     self.mt5_connected = True
                     self.initial_balance = account_info.balance
                     self.account_status_var.set(f"Status: MT5 Connected - Account {account_info.login}")
@@ -983,9 +1318,10 @@ class AdvancedTradingEngine:
                         'running_time': 0
                     })
                     
-                    # Test symbol access
-                    test_symbol = self.symbol_var.get()
-                    symbol_info = mt5.symbol_info(test_symbol)
+                    # Test symbol access (also warms the symbol cache)
+                    test_symbol = self._param_vars['symbol'].get()
+                    self._symbol_info_cache.clear()
+                    symbol_info = self.get_symbol_info(test_symbol)
                     if symbol_info:
                         self.log(f"✅ Symbol {test_symbol} available for trading", "success")
                     else:
@@ -1005,8 +1341,10 @@ class AdvancedTradingEngine:
             self.stop_trading()
         
         if self.mt5_connected:
-            mt5.shutdown()
+            with self._mt5_lock:
+                mt5.shutdown()
         
+        self.close_trade_log()
         self.root.destroy()
     
     def run(self):
@@ -1023,33 +1361,35 @@ class AdvancedMarketAnalyzer:
         
     def perform_deep_analysis(self, symbol, market_data, technical_indicators):
         """Perform comprehensive market analysis"""
-        try:
-            if not market_data or not technical_indicators:
-                return {'valid': False, 'reason': 'Insufficient data'}
-            
-            prices = market_data['price_history']
-            current_price = market_data['current_price']
-            
-            # Multi-timeframe analysis with technical indicators
-            analysis = {
-                'valid': True,
-                'symbol': symbol,
-                'current_price': current_price,
-                'trend_strength': self.calculate_trend_strength(prices, technical_indicators),
-                'volatility': market_data['volatility'],
-                'momentum': market_data['momentum'],
-                'support_resistance': self.find_support_resistance(prices),
-                'market_regime': self.identify_market_regime(prices, technical_indicators),
-                'volume_profile': self.analyze_volume_profile(prices),
-                'fractal_dimension': self.calculate_fractal_dimension(prices),
-                'technical_indicators': technical_indicators,
-                'market_data': market_data
-            }
-            
-            return analysis
-            
-        except Exception as e:
-            return {'valid': False, 'reason': f'Analysis error: {e}'}
+        if not market_data or not technical_indicators:
+            return {'valid': False, 'reason': 'Insufficient data'}
+        
+        # One contiguous float64 array shared by every analysis step (a no-op
+        # for the provider's ring-buffer view, a single copy for anything else)
+        prices = np.ascontiguousarray(market_data['price_history'], dtype=np.float64)
+        current_price = market_data['current_price']
+        
+        # Every analysis step below is well-defined once this much history exists
+        if len(prices) < MIN_ANALYSIS_PERIODS:
+            return {'valid': False, 'reason': 'Insufficient price history'}
+        
+        # Multi-timeframe analysis with technical indicators
+        analysis = {
+            'valid': True,
+            'symbol': symbol,
+            'current_price': current_price,
+            'trend_strength': self.calculate_trend_strength(prices, technical_indicators),
+            'volatility': market_data['volatility'],
+            'momentum': market_data['momentum'],
+            'support_resistance': self.find_support_resistance(prices),
+            'market_regime': self.identify_market_regime(prices, technical_indicators),
+            'volume_profile': self.analyze_volume_profile(prices),
+            'fractal_dimension': self.calculate_fractal_dimension(prices),
+            'technical_indicators': technical_indicators,
+            'market_data': market_data
+        }
+        
+        return analysis
     
     def calculate_trend_strength(self, prices, technical_indicators):
         """Calculate advanced trend strength using multiple indicators"""
@@ -1057,9 +1397,9 @@ class AdvancedMarketAnalyzer:
             return 0
         
         # Price trend analysis
-        short_trend = np.polyfit(range(10), prices[-10:], 1)[0]
-        medium_trend = np.polyfit(range(20), prices[-20:], 1)[0]
-        long_trend = np.polyfit(range(50), prices[-50:], 1)[0] if len(prices) >= 50 else 0
+        short_trend = np.dot(prices[-10:], SLOPE_WEIGHTS[10])
+        medium_trend = np.dot(prices[-20:], SLOPE_WEIGHTS[20])
+        long_trend = np.dot(prices[-50:], SLOPE_WEIGHTS[50]) if len(prices) >= 50 else 0
         
         # Moving average convergence/divergence
         sma_8 = technical_indicators.get('sma_8', prices[-1])
@@ -1113,13 +1453,19 @@ class AdvancedMarketAnalyzer:
         if len(prices) < 14:
             return 0
             
-        # RSI-based momentum
-        deltas = np.diff(prices)
-        gains = np.where(deltas > 0, deltas, 0)
-        losses = np.where(deltas < 0, -deltas, 0)
+        # RSI-based momentum over the last 14 price changes
+        recent = prices[-15:].tolist()
+        gain_sum = 0.0
+        loss_sum = 0.0
+        for i in range(1, len(recent)):
+            delta = recent[i] - recent[i - 1]
+            if delta > 0:
+                gain_sum += delta
+            else:
+                loss_sum -= delta
         
-        avg_gain = np.mean(gains[-14:])
-        avg_loss = np.mean(losses[-14:])
+        avg_gain = gain_sum / (len(recent) - 1)
+        avg_loss = loss_sum / (len(recent) - 1)
         
         if avg_loss == 0:
             return 1.0
@@ -1145,15 +1491,14 @@ class AdvancedMarketAnalyzer:
         
         current_price = prices[-1]
         
-        # Find nearest support/resistance
-        resistance_levels = prices[highs] if len(highs) > 0 else [current_price]
-        support_levels = prices[lows] if len(lows) > 0 else [current_price]
+        # Find nearest levels - nearest extremum beyond the current price
+        above = prices[highs]
+        above = above[above > current_price]
+        below = prices[lows]
+        below = below[below < current_price]
         
-        # Find nearest levels
-        resistance = min([r for r in resistance_levels if r > current_price], 
-                        default=current_price * 1.01)
-        support = max([s for s in support_levels if s < current_price], 
-                     default=current_price * 0.99)
+        resistance = above.min() if above.size else current_price * 1.01
+        support = below.max() if below.size else current_price * 0.99
         
         return {'support': support, 'resistance': resistance}
     
@@ -1164,7 +1509,7 @@ class AdvancedMarketAnalyzer:
         
         # Volatility analysis
         atr = technical_indicators.get('atr', 0.001)
-        current_volatility = np.std(prices[-20:]) / np.mean(prices[-20:])
+        current_volatility = window_std(prices[-20:]) / window_mean(prices[-20:])
         
         # Trend analysis
         trend_strength = abs(self.calculate_trend_strength(prices, technical_indicators))
@@ -1215,16 +1560,14 @@ class AdvancedMarketAnalyzer:
             return 1.5
         
         # Simplified Hurst exponent calculation
-        lags = range(2, min(20, len(prices)//2))
-        tau = []
+        max_lag = min(20, len(prices)//2)
         
-        for lag in lags:
-            # Calculate mean of absolute differences
-            tau.append(np.mean(np.abs(np.diff(prices, lag))))
+        # Mean absolute differences for every lag 2..max_lag-1 in one pass
+        tau = difference_scales(prices, max_lag)
         
         # Linear regression in log space
         if len(tau) > 1:
-            slope = np.polyfit(np.log(lags), np.log(tau), 1)[0]
+            slope = np.dot(np.log(tau), _log_lag_slope_weights(max_lag))
             hurst = slope
             return min(max(hurst, 0), 2)  # Clamp between 0 and 2
         
@@ -1234,146 +1577,128 @@ class IntelligentSignalProcessor:
     """Intelligent signal processing with ML integration"""
     
     def __init__(self):
-        self.signal_history = []
+        self.signal_history = deque(maxlen=SIGNAL_HISTORY_SIZE)
         
     def generate_intelligent_signal(self, analysis, mode_settings, ml_model=None):
         """Generate intelligent trading signal with enhanced profitability focus"""
-        try:
-            if not analysis['valid']:
-                return {'action': 'HOLD', 'confidence': 0}
-            
-            # Extract comprehensive features
-            features = self.extract_features(analysis)
-            technical_indicators = analysis.get('technical_indicators', {})
-            
-            # Advanced multi-factor signal generation
-            signals = {
-                'trend_signal': self.generate_trend_signal(analysis, technical_indicators),
-                'momentum_signal': self.generate_momentum_signal(analysis, technical_indicators),
-                'mean_reversion_signal': self.generate_mean_reversion_signal(analysis, technical_indicators),
-                'breakout_signal': self.generate_breakout_signal(analysis, technical_indicators),
-                'volume_signal': self.generate_volume_signal(analysis, technical_indicators),
-                'volatility_signal': self.generate_volatility_signal(analysis, technical_indicators),
-                'confluence_signal': self.generate_confluence_signal(analysis, technical_indicators)
-            }
-            
-            # Enhanced signal weights based on market regime
-            regime = analysis.get('market_regime', 'UNKNOWN')
-            signal_weights = self.get_regime_based_weights(regime)
-            
-            # Calculate weighted signal with regime adjustment
-            weighted_signal = 0
-            total_confidence = 0
-            signal_count = 0
-            
-            for signal_type, signal_data in signals.items():
-                if signal_data['confidence'] > 0.1:  # Only count meaningful signals
-                    weight = signal_weights[signal_type]
-                    weighted_signal += signal_data['score'] * weight
-                    total_confidence += signal_data['confidence'] * weight
-                    signal_count += 1
-            
-            # Require minimum signal confluence for high-probability trades
-            min_signals_required = {
-                'CONSERVATIVE': 5,
-                'BALANCED': 4,
-                'AGGRESSIVE': 3,
-                'ULTRA_HFT': 6
+        if not analysis['valid']:
+            return {'action': 'HOLD', 'confidence': 0}
+        
+        # Extract comprehensive features
+        features = self.extract_features(analysis)
+        technical_indicators = analysis.get('technical_indicators', {})
+        
+        # Advanced multi-factor signal generation
+        signals = {
+            'trend_signal': self.generate_trend_signal(analysis, technical_indicators),
+            'momentum_signal': self.generate_momentum_signal(analysis, technical_indicators),
+            'mean_reversion_signal': self.generate_mean_reversion_signal(analysis, technical_indicators),
+            'breakout_signal': self.generate_breakout_signal(analysis, technical_indicators),
+            'volume_signal': self.generate_volume_signal(analysis, technical_indicators),
+            'volatility_signal': self.generate_volatility_signal(analysis, technical_indicators),
+            'confluence_signal': self.generate_confluence_signal(analysis, technical_indicators)
+        }
+        
+        # Enhanced signal weights based on market regime
+        regime = analysis.get('market_regime', 'UNKNOWN')
+        signal_weights = self.get_regime_based_weights(regime)
+        
+        # Calculate weighted signal with regime adjustment
+        weighted_signal = 0
+        total_confidence = 0
+        signal_count = 0
+        
+        for signal_type, signal_data in signals.items():
+            if signal_data['confidence'] > 0.1:  # Only count meaningful signals
+                weight = signal_weights[signal_type]
+                weighted_signal += signal_data['score'] * weight
+                total_confidence += signal_data['confidence'] * weight
+                signal_count += 1
+        
+        # Require minimum signal confluence for high-probability trades
+        mode = mode_settings.get('name', 'BALANCED')
+        min_signals = MIN_SIGNALS_REQUIRED.get(mode.split()[0], 4)
+        
+        if signal_count < min_signals:
+            return {
+                'action': 'HOLD',
+                'confidence': 0,
+                'reason': f'Insufficient signal confluence ({signal_count}/{min_signals})'
             }
+        
+        # Enhanced action determination with strict thresholds
+        action = 'HOLD'
+        confidence_threshold = mode_settings.get('min_confidence', 0.6)
+        
+        # Strict signal thresholds for profitability
+        strong_signal_threshold = 0.6
+        moderate_signal_threshold = 0.4
+        
+        if weighted_signal > strong_signal_threshold and total_confidence > confidence_threshold:
+            action = 'BUY'
+        elif weighted_signal < -strong_signal_threshold and total_confidence > confidence_threshold:
+            action = 'SELL'
+        elif abs(weighted_signal) > moderate_signal_threshold and total_confidence > confidence_threshold * 1.2:
+            # Allow moderate signals only with higher confidence
+            action = 'BUY' if weighted_signal > 0 else 'SELL'
+        
+        # Additional filters for profit optimization
+        if action != 'HOLD':
+            # Filter 1: Market volatility check
+            volatility = analysis.get('volatility', 0)
+            if volatility > 0.05:  # Too volatile
+                action = 'HOLD'
+                total_confidence *= 0.5
             
-            mode = mode_settings.get('name', 'BALANCED')
-            min_signals = min_signals_required.get(mode.split()[0], 4)
-            
-            if signal_count < min_signals:
-                return {
-                    'action': 'HOLD',
-                    'confidence': 0,
-                    'reason': f'Insufficient signal confluence ({signal_count}/{min_signals})'
-                }
-            
-            # Enhanced action determination with strict thresholds
-            action = 'HOLD'
-            confidence_threshold = mode_settings.get('min_confidence', 0.6)
-            
-            # Strict signal thresholds for profitability
-            strong_signal_threshold = 0.6
-            moderate_signal_threshold = 0.4
-            
-            if weighted_signal > strong_signal_threshold and total_confidence > confidence_threshold:
-                action = 'BUY'
-            elif weighted_signal < -strong_signal_threshold and total_confidence > confidence_threshold:
-                action = 'SELL'
-            elif abs(weighted_signal) > moderate_signal_threshold and total_confidence > confidence_threshold * 1.2:
-                # Allow moderate signals only with higher confidence
-                action = 'BUY' if weighted_signal > 0 else 'SELL'
-            
-            # Additional filters for profit optimization
-            if action != 'HOLD':
-                # Filter 1: Market volatility check
-                volatility = analysis.get('volatility', 0)
-                if volatility > 0.05:  # Too volatile
-                    action = 'HOLD'
-                    total_confidence *= 0.5
-                
-                # Filter 2: RSI extremes check
-                rsi = technical_indicators.get('rsi', 50)
-                if action == 'BUY' and rsi > 75:  # Overbought
-                    action = 'HOLD'
-                elif action == 'SELL' and rsi < 25:  # Oversold
-                    action = 'HOLD'
-                
-                # Filter 3: MACD divergence check
-                macd_line = technical_indicators.get('macd_line', 0)
-                macd_signal = technical_indicators.get('macd_signal', 0)
-                if action == 'BUY' and macd_line < macd_signal:
-                    total_confidence *= 0.7
-                elif action == 'SELL' and macd_line > macd_signal:
-                    total_confidence *= 0.7
-                
-                # Filter 4: Bollinger Band position
-                current_price = analysis.get('current_price', 0)
-                bb_upper = technical_indicators.get('bb_upper', current_price)
-                bb_lower = technical_indicators.get('bb_lower', current_price)
-                bb_middle = technical_indicators.get('bb_middle', current_price)
-                
-                bb_position = (current_price - bb_lower) / (bb_upper - bb_lower) if bb_upper != bb_lower else 0.5
-                
-                if action == 'BUY' and bb_position > 0.8:  # Near upper band
-                    total_confidence *= 0.6
-                elif action == 'SELL' and bb_position < 0.2:  # Near lower band
-                    total_confidence *= 0.6
-            
-            # Final confidence adjustment based on historical performance
-            if hasattr(self, 'signal_history') and len(self.signal_history) > 10:
-                recent_accuracy = self.calculate_recent_signal_accuracy()
-                total_confidence *= (0.5 + recent_accuracy / 2)  # Scale confidence by recent performance
-            
-            final_signal = {
-                'action': action,
-                'confidence': min(total_confidence, 1.0),
-                'weighted_score': weighted_signal,
-                'individual_signals': signals,
-                'features': features,
-                'volatility': analysis['volatility'],
-                'signal_count': signal_count,
-                'regime': regime,
-                'filters_applied': action != 'HOLD'
-            }
+            # Filter 2: RSI extremes check
+            rsi = technical_indicators.get('rsi', 50)
+            if action == 'BUY' and rsi > 75:  # Overbought
+                action = 'HOLD'
+            elif action == 'SELL' and rsi < 25:  # Oversold
+                action = 'HOLD'
             
-            self.signal_history.append(final_signal)
+            # Filter 3: MACD divergence check
+            macd_line = technical_indicators.get('macd_line', 0)
+            macd_signal = technical_indicators.get('macd_signal', 0)
+            if action == 'BUY' and macd_line < macd_signal:
+                total_confidence *= 0.7
+            elif action == 'SELL' and macd_line > macd_signal:
+                total_confidence *= 0.7
             
-            # Keep only recent signal history
-            if len(self.signal_history) > 100:
-                self.signal_history = self.signal_history[-100:]
+            # Filter 4: Bollinger Band position
+            current_price = analysis.get('current_price', 0)
+            bb_upper = technical_indicators.get('bb_upper', current_price)
+            bb_lower = technical_indicators.get('bb_lower', current_price)
+            bb_middle = technical_indicators.get('bb_middle', current_price)
             
-            return final_signal
+            bb_position = (current_price - bb_lower) / (bb_upper - bb_lower) if bb_upper != bb_lower else 0.5
             
-        except Exception as e:
-            return {
-                'action': 'HOLD',
-                'confidence': 0,
-                'error': str(e)
-            }
+            if action == 'BUY' and bb_position > 0.8:  # Near upper band
+                total_confidence *= 0.6
+            elif action == 'SELL' and bb_position < 0.2:  # Near lower band
+                total_confidence *= 0.6
+        
+        # Final confidence adjustment based on historical performance
+        if hasattr(self, 'signal_history') and len(self.signal_history) > 10:
+            recent_accuracy = self.calculate_recent_signal_accuracy()
+            total_confidence *= (0.5 + recent_accuracy / 2)  # Scale confidence by recent performance
+        
+        final_signal = {
+            'action': action,
+            'confidence': min(total_confidence, 1.0),
+            'weighted_score': weighted_signal,
+            'individual_signals': signals,
+            'features': features,
+            'volatility': analysis['volatility'],
+            'signal_count': signal_count,
+            'regime': regime,
+            'filters_applied': action != 'HOLD'
+        }
+        
+        # Bounded deque drops the oldest signal itself - no re-slicing
+        self.signal_history.append(final_signal)
+        
+        return final_signal
     
     def get_regime_based_weights(self, regime):
         """Get signal weights based on market regime"""
@@ -1411,7 +1736,7 @@ class IntelligentSignalProcessor:
         if len(self.signal_history) < 10:
             return 0.6  # Default assumption
         
-        recent_signals = self.signal_history[-20:]
+        recent_signals = list(islice(reversed(self.signal_history), SIGNAL_ACCURACY_WINDOW))
         accurate_signals = sum(1 for signal in recent_signals 
                              if signal.get('actual_result', 'unknown') == 'profitable')
         
@@ -1439,16 +1764,14 @@ class IntelligentSignalProcessor:
         sma_55 = technical_indicators.get('sma_55', 0)
         current_price = analysis.get('current_price', 0)
         
-        # Trend direction scoring
-        ma_trend_score = 0
-        if sma_8 > sma_21 > sma_55 and current_price > sma_8:
-            ma_trend_score = 1.0  # Strong uptrend
-        elif sma_8 < sma_21 < sma_55 and current_price < sma_8:
-            ma_trend_score = -1.0  # Strong downtrend
-        elif sma_8 > sma_21 and current_price > sma_21:
-            ma_trend_score = 0.6  # Moderate uptrend
-        elif sma_8 < sma_21 and current_price < sma_21:
-            ma_trend_score = -0.6  # Moderate downtrend
+        # Trend direction scoring - pack the comparisons and look the score up
+        mask = (
+            (sma_8 > sma_21) | (sma_21 > sma_55) << 1 |
+            (current_price > sma_8) << 2 | (current_price > sma_21) << 3 |
+            (sma_8 < sma_21) << 4 | (sma_21 < sma_55) << 5 |
+            (current_price < sma_8) << 6 | (current_price < sma_21) << 7
+        )
+        ma_trend_score = MA_TREND_SCORES[mask]
         
         # Combine trend indicators
         combined_score = (trend_strength * 0.6 + ma_trend_score * 0.4)
@@ -1626,21 +1949,17 @@ class IntelligentSignalProcessor:
         momentum = analysis.get('momentum', 0)
         volatility = analysis.get('volatility', 0.01)
         
-        # Confluence scoring
-        confluence_factors = 0
-        if abs(trend_strength) > 0.5:
-            confluence_factors += 1
-        if abs(momentum) > 0.3:
-            confluence_factors += 1
-        if volatility > 0.015:
-            confluence_factors += 1
-        
-        # RSI confluence
         rsi = technical_indicators.get('rsi', 50)
-        if rsi < 30 or rsi > 70:
-            confluence_factors += 1
         
-        confluence_score = confluence_factors / 4.0  # Normalize to 0-1
+        # Confluence scoring - one bit per factor, score is the popcount
+        confluence_mask = (
+            bool(abs(trend_strength) > 0.5)
+            | bool(abs(momentum) > 0.3) << 1
+            | bool(volatility > 0.015) << 2
+            | bool(rsi < 30 or rsi > 70) << 3  # RSI confluence
+        )
+        
+        confluence_score = confluence_mask.bit_count() / 4.0  # Normalize to 0-1
         direction = 1 if (trend_strength + momentum) > 0 else -1
         
         return {'score': confluence_score * direction, 'confidence': confluence_score}
@@ -1682,8 +2001,7 @@ class SmartPortfolioManager:
         base_risk_pct = mode_settings['max_risk_pct']
         
         # Kelly Criterion adjustment
-        win_rate = self.calculate_recent_winrate()
-        avg_win_loss_ratio = self.calculate_avg_win_loss_ratio()
+        win_rate, avg_win_loss_ratio = self.calculate_recent_trade_stats()
         
         if win_rate > 0 and avg_win_loss_ratio > 0:
             kelly_fraction = (win_rate * avg_win_loss_ratio - (1 - win_rate)) / avg_win_loss_ratio
@@ -1704,31 +2022,31 @@ class SmartPortfolioManager:
         
         return round(lot_size, 2)
     
-    def calculate_recent_winrate(self):
-        """Calculate recent win rate"""
+    def calculate_recent_trade_stats(self):
+        """Calculate recent win rate and average win/loss ratio in one pass"""
         if len(self.position_history) < 10:
-            return 0.6  # Default assumption
+            return 0.6, 1.5  # Default assumptions
         
         recent_trades = self.position_history[-20:]  # Last 20 trades
-        wins = sum(1 for trade in recent_trades if trade.get('profit', 0) > 0)
-        return wins / len(recent_trades)
-    
-    def calculate_avg_win_loss_ratio(self):
-        """Calculate average win/loss ratio"""
-        if len(self.position_history) < 10:
-            return 1.5  # Default assumption
-        
-        recent_trades = self.position_history[-20:]
-        wins = [trade['profit'] for trade in recent_trades if trade.get('profit', 0) > 0]
-        losses = [abs(trade['profit']) for trade in recent_trades if trade.get('profit', 0) < 0]
-        
+        wins = losses = 0
+        win_total = loss_total = 0.0
+        for trade in recent_trades:
+            profit = trade.get('profit', 0)
+            if profit > 0:
+                wins += 1
+                win_total += profit
+            elif profit < 0:
+                losses += 1
+                loss_total -= profit
+        
+        win_rate = wins / len(recent_trades)
         if not wins or not losses:
-            return 1.5
+            return win_rate, 1.5
         
-        avg_win = np.mean(wins)
-        avg_loss = np.mean(losses)
+        avg_win = win_total / wins
+        avg_loss = loss_total / losses
         
-        return avg_win / avg_loss if avg_loss > 0 else 1.5
+        return win_rate, avg_win / avg_loss
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Ahead-of-time build of the indicator kernel
+Compiles indicators._difference_scales into the _indicator_kernels extension
+so the bot imports machine code instead of JIT-compiling on the first analysis
+"""
+
+import os
+import sys
+
+try:
+    from numba.pycc import CC
+except ImportError:
+    print("❌ Numba with pycc support is required to build the AOT kernels")
+    sys.exit(1)
+
+from indicators import _difference_scales
+
+# prices (C-contiguous float64), max difference order
+KERNEL_SIGNATURE = "f8[:](f8[::1], i8)"
+
+def main():
+    """Build _indicator_kernels next to this script"""
+    cc = CC("_indicator_kernels")
+    cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+    cc.export("difference_scales", KERNEL_SIGNATURE)(_difference_scales.py_func)
+    
+    print("🔧 Compiling indicator kernels...")
+    cc.compile()
+    print(f"✅ Built _indicator_kernels in {cc.output_dir}")
+
+if __name__ == "__main__":
+    main()
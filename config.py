@@ -2,28 +2,33 @@
 Core Configuration - Essential Settings
 """
 
+from dataclasses import dataclass
+
+# Frozen and slotted: settings are fixed for the process, and slot reads
+# skip the instance __dict__ on hot paths like the HFT risk check
+@dataclass(frozen=True, slots=True)
 class Config:
     # MetaTrader5 Settings
-    MT5_MAGIC_NUMBER = 123456789
-    MT5_DEVIATION = 10
-    MT5_TIMEOUT = 10000
+    MT5_MAGIC_NUMBER: int = 123456789
+    MT5_DEVIATION: int = 10
+    MT5_TIMEOUT: int = 10000
     
     # Trading Parameters
-    MAX_ORDER_PER_SESSION = 50
-    MAX_ORDER_PER_SESSION_HFT = 100
+    MAX_ORDER_PER_SESSION: int = 50
+    MAX_ORDER_PER_SESSION_HFT: int = 100
     
     # Risk Management
-    MAX_RISK_PER_TRADE = 0.5
-    MAX_DRAWDOWN = 3.0
-    STOP_LOSS_PERSEN_BALANCE = 2.0
-    TAKE_PROFIT_PERSEN_BALANCE = 1.0
+    MAX_RISK_PER_TRADE: float = 0.5
+    MAX_DRAWDOWN: float = 3.0
+    STOP_LOSS_PERSEN_BALANCE: float = 2.0
+    TAKE_PROFIT_PERSEN_BALANCE: float = 1.0
     
     # Signal Processing
-    SIGNAL_CONFIDENCE_THRESHOLD = 0.6
-    SIGNAL_CONFIDENCE_THRESHOLD_HFT = 0.8
+    SIGNAL_CONFIDENCE_THRESHOLD: float = 0.6
+    SIGNAL_CONFIDENCE_THRESHOLD_HFT: float = 0.8
     
     # HFT Protection
-    HFT_MAX_CONSECUTIVE_LOSSES = 3
-    HFT_COOLDOWN_MINUTES = 15
+    HFT_MAX_CONSECUTIVE_LOSSES: int = 3
+    HFT_COOLDOWN_MINUTES: int = 15
 
 config = Config()
\ No newline at end of file
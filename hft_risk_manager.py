@@ -4,15 +4,22 @@ Designed to prevent consecutive losses and improve winrate
 """
 
 import datetime
+from collections import deque, namedtuple
 from config import config
 
+# Number of recent trades kept for risk tracking
+TRADE_HISTORY_SIZE = 50
+
+# One recorded trade - a tuple, so no per-record dict
+TradeRecord = namedtuple('TradeRecord', ['timestamp', 'profit_loss', 'balance_impact'])
+
 class HFTRiskManager:
     def __init__(self):
         self.consecutive_losses = 0
         self.cooldown_until = None
         self.daily_loss_amount = 0
         self.session_profit = 0
-        self.trade_history = []
+        self.trade_history = deque(maxlen=TRADE_HISTORY_SIZE)
         self.last_trade_result = None
         self.starting_balance = None
         
@@ -26,7 +33,8 @@ class HFTRiskManager:
         """Check if HFT trade should be allowed"""
         now = datetime.datetime.now()
         
-        # Initialize starting balance
+        # Initialize starting balance - a zero balance counts as unset, so a
+        # simulation-mode 0 is replaced once a real account reports in
         if not self.starting_balance:
             self.starting_balance = current_balance
         
@@ -39,10 +47,11 @@ class HFTRiskManager:
             self.cooldown_until = now + datetime.timedelta(minutes=self.cooldown_minutes)
             return False, f"{self.max_consecutive_losses} consecutive losses - cooldown activated"
         
-        # 3. Check daily loss limit
-        daily_loss_pct = (self.daily_loss_amount / self.starting_balance) * 100
-        if daily_loss_pct > self.max_daily_loss_pct:
-            return False, f"Daily loss limit reached ({daily_loss_pct:.1f}%)"
+        # 3. Check daily loss limit (no percentage without a balance)
+        if self.starting_balance:
+            daily_loss_pct = (self.daily_loss_amount / self.starting_balance) * 100
+            if daily_loss_pct > self.max_daily_loss_pct:
+                return False, f"Daily loss limit reached ({daily_loss_pct:.1f}%)"
         
         # 4. Check session loss limit
         if self.session_profit < -self.max_session_loss:
@@ -52,21 +61,20 @@ class HFTRiskManager:
         if signal_confidence < config.SIGNAL_CONFIDENCE_THRESHOLD_HFT:
             return False, f"Signal confidence too low ({signal_confidence:.3f})"
         
-        # 6. Check if last 3 trades were losses (extra protection)
-        if len(self.trade_history) >= 3:
-            last_3_results = [t['profit_loss'] for t in self.trade_history[-3:]]
-            if all(pl < 0 for pl in last_3_results):
-                return False, "Last 3 trades were losses - protection active"
+        # 6. Check if last 3 trades were losses (extra protection) - the
+        # losing streak counter already tracks this, no history scan needed
+        if self.consecutive_losses >= 3:
+            return False, "Last 3 trades were losses - protection active"
         
         return True, "Trade allowed"
     
     def record_trade_result(self, profit_loss):
         """Record trade result and update protection counters"""
-        self.trade_history.append({
-            'timestamp': datetime.datetime.now(),
-            'profit_loss': profit_loss,
-            'balance_impact': (profit_loss / self.starting_balance) * 100 if self.starting_balance else 0
-        })
+        self.trade_history.append(TradeRecord(
+            datetime.datetime.now(),
+            profit_loss,
+            (profit_loss / self.starting_balance) * 100 if self.starting_balance else 0
+        ))
         
         # Update counters
         self.session_profit += profit_loss
@@ -78,18 +86,16 @@ class HFTRiskManager:
         else:
             self.consecutive_losses = 0  # Reset on any profit
             self.last_trade_result = 'PROFIT'
-        
-        # Keep only last 50 trades
-        if len(self.trade_history) > 50:
-            self.trade_history = self.trade_history[-50:]
+    
+    def cooldown_remaining(self):
+        """Seconds left in the current cooldown (0 when not cooling down)"""
+        if self.cooldown_until:
+            return max((self.cooldown_until - datetime.datetime.now()).total_seconds(), 0)
+        return 0
     
     def get_risk_status(self):
         """Get current risk status summary"""
-        now = datetime.datetime.now()
-        cooldown_remaining = 0
-        
-        if self.cooldown_until and now < self.cooldown_until:
-            cooldown_remaining = (self.cooldown_until - now).total_seconds() / 60
+        cooldown_remaining = self.cooldown_remaining() / 60
         
         daily_loss_pct = 0
         if self.starting_balance:
@@ -112,7 +118,7 @@ class HFTRiskManager:
         self.session_profit = 0
         self.consecutive_losses = 0
         self.cooldown_until = None
-        self.trade_history = []
+        self.trade_history.clear()
     
     def calculate_safe_lot_size(self, balance, base_lot_size, signal_confidence):
         """Calculate safer lot size based on current risk factors"""
@@ -0,0 +1,239 @@
+"""
+Technical Indicator Kernels
+Per-tick running indicators and price-window helpers; the difference kernel
+is JIT-compiled with Numba when available
+"""
+
+import math
+from collections import deque
+import numpy as np
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    print("⚠️ Numba not available - indicators run in pure Python")
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+try:
+    # Precompiled by build_aot.py - skips the JIT compile on first use
+    from _indicator_kernels import difference_scales as _aot_difference_scales
+    AOT_AVAILABLE = True
+except ImportError:
+    AOT_AVAILABLE = False
+
+def window_mean(values):
+    """Mean of a short price window.
+    
+    Indicator windows are 8-55 values, where NumPy's per-call dispatch costs
+    more than the arithmetic; a Python float list with math.fsum is faster
+    and exactly rounded.
+    """
+    if isinstance(values, np.ndarray):
+        values = values.tolist()
+    return math.fsum(values) / len(values)
+
+def window_std(values):
+    """Population standard deviation of a short price window (np.std ddof=0)"""
+    if isinstance(values, np.ndarray):
+        values = values.tolist()
+    n = len(values)
+    mean = math.fsum(values) / n
+    return math.sqrt(math.fsum([(v - mean) * (v - mean) for v in values]) / n)
+
+def window_range(values):
+    """(low, high) of a short price window from one list conversion"""
+    if isinstance(values, np.ndarray):
+        values = values.tolist()
+    return min(values), max(values)
+
+@njit(cache=True)
+def _difference_scales(prices, max_order):
+    """Mean |n-th order difference| for n = 2..max_order-1, one order at a time.
+    
+    Each order is differenced in place from the previous one instead of
+    rebuilding it from the prices.
+    """
+    work = prices.copy()
+    m = len(work)
+    scales = np.empty(max(max_order - 2, 0), dtype=np.float64)
+    for order in range(1, max_order):
+        m -= 1
+        total = 0.0
+        for i in range(m):
+            work[i] = work[i + 1] - work[i]
+            total += abs(work[i])
+        if order >= 2:
+            scales[order - 2] = total / m
+    return scales
+
+def _difference_scales_numpy(prices, max_order):
+    """NumPy version of _difference_scales for when Numba is missing"""
+    scales = np.empty(max(max_order - 2, 0), dtype=np.float64)
+    diffs = np.diff(prices)
+    for order in range(2, max_order):
+        diffs = np.diff(diffs)
+        scales[order - 2] = np.abs(diffs).mean()
+    return scales
+
+def difference_scales(prices, max_order):
+    """Mean absolute n-th order differences of prices for n = 2..max_order-1"""
+    prices = np.ascontiguousarray(prices, dtype=np.float64)
+    if AOT_AVAILABLE:
+        kernel = _aot_difference_scales
+    elif NUMBA_AVAILABLE:
+        kernel = _difference_scales
+    else:
+        kernel = _difference_scales_numpy
+    return kernel(prices, int(max_order))
+
+def warmup():
+    """Compile (or load from Numba's on-disk cache) the difference kernel up front"""
+    if AOT_AVAILABLE or not NUMBA_AVAILABLE:
+        return
+    difference_scales(np.linspace(1.0, 2.0, 64), 20)
+
+# Running sums are rebuilt from the window this often to shed float drift
+INDICATOR_RESYNC_TICKS = 1000
+
+class IndicatorState:
+    """Live indicators for one symbol, updated in O(1) per tick.
+    
+    Window sums (SMA 8/21/50/55, Bollinger 20, ATR 14) add the new price and
+    subtract the one leaving the window; EMAs and RSI use their recurrences.
+    Finished values are published as one tuple so readers on other threads
+    never see a half-applied update.
+    """
+    
+    # update() touches most of these every tick - slots keep that off a dict
+    __slots__ = ('rsi_period', 'bb_period', 'bb_std', 'atr_period', 'window', 'count',
+                 'sum_8', 'sum_21', 'sum_50', 'sum_55', 'bb_shift', 'bb_sum', 'bb_sum_sq',
+                 'range_sum', 'ema_12', 'ema_26', 'avg_gain', 'avg_loss', 'values')
+    
+    def __init__(self, rsi_period=14, bb_period=20, bb_std=2.0, atr_period=14):
+        self.rsi_period = rsi_period
+        self.bb_period = bb_period
+        self.bb_std = bb_std
+        self.atr_period = atr_period
+        # Largest window (55) plus the price that just left it
+        self.window = deque(maxlen=56)
+        self.count = 0
+        self.sum_8 = 0.0
+        self.sum_21 = 0.0
+        self.sum_50 = 0.0
+        self.sum_55 = 0.0
+        # Bollinger sums are taken around a shift price to avoid cancellation
+        self.bb_shift = 0.0
+        self.bb_sum = 0.0
+        self.bb_sum_sq = 0.0
+        self.range_sum = 0.0
+        self.ema_12 = 0.0
+        self.ema_26 = 0.0
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.values = None
+    
+    def update(self, price):
+        """Fold one new price into the running indicators"""
+        window = self.window
+        prev = window[-1] if window else price
+        window.append(price)
+        self.count += 1
+        count = self.count
+        
+        # Moving-window sums: add the newest, drop the one falling out
+        self.sum_8 += price
+        self.sum_21 += price
+        self.sum_50 += price
+        self.sum_55 += price
+        if count > 8:
+            self.sum_8 -= window[-9]
+        if count > 21:
+            self.sum_21 -= window[-22]
+        if count > 50:
+            self.sum_50 -= window[-51]
+        if count > 55:
+            self.sum_55 -= window[-56]
+        
+        if count == 1:
+            self.bb_shift = price
+        shifted = price - self.bb_shift
+        self.bb_sum += shifted
+        self.bb_sum_sq += shifted * shifted
+        if count > self.bb_period:
+            dropped = window[-1 - self.bb_period] - self.bb_shift
+            self.bb_sum -= dropped
+            self.bb_sum_sq -= dropped * dropped
+        
+        delta = price - prev
+        if count > 1:
+            self.range_sum += abs(delta)
+        if count > self.atr_period + 1:
+            self.range_sum -= abs(window[-1 - self.atr_period] - window[-2 - self.atr_period])
+        
+        # EMA and Wilder RSI recurrences
+        if count == 1:
+            self.ema_12 = price
+            self.ema_26 = price
+        else:
+            self.ema_12 += (price - self.ema_12) * (2.0 / 13.0)
+            self.ema_26 += (price - self.ema_26) * (2.0 / 27.0)
+            
+            period = self.rsi_period
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+            if count <= period + 1:
+                self.avg_gain += gain / period
+                self.avg_loss += loss / period
+            else:
+                self.avg_gain = (self.avg_gain * (period - 1) + gain) / period
+                self.avg_loss = (self.avg_loss * (period - 1) + loss) / period
+        
+        if count % INDICATOR_RESYNC_TICKS == 0:
+            self._resync()
+        
+        self._publish()
+    
+    def _resync(self):
+        """Recompute the window sums exactly from the retained prices"""
+        prices = list(self.window)
+        self.sum_8 = math.fsum(prices[-8:])
+        self.sum_21 = math.fsum(prices[-21:])
+        self.sum_50 = math.fsum(prices[-50:])
+        self.sum_55 = math.fsum(prices[-55:])
+        self.bb_shift = prices[-1]
+        shifted = [p - self.bb_shift for p in prices[-self.bb_period:]]
+        self.bb_sum = math.fsum(shifted)
+        self.bb_sum_sq = math.fsum([v * v for v in shifted])
+        recent = prices[-1 - self.atr_period:]
+        self.range_sum = math.fsum([abs(recent[i] - recent[i - 1]) for i in range(1, len(recent))])
+    
+    def _publish(self):
+        """Snapshot the current indicator values as one tuple"""
+        count = self.count
+        sma_8 = self.sum_8 / min(count, 8)
+        sma_21 = self.sum_21 / min(count, 21)
+        sma_55 = self.sum_55 / 55 if count >= 55 else sma_21
+        
+        if count < self.rsi_period + 1:
+            rsi = 50.0
+        elif self.avg_loss == 0:
+            rsi = 100.0
+        else:
+            rsi = 100.0 - (100.0 / (1.0 + self.avg_gain / self.avg_loss))
+        
+        n = min(count, self.bb_period)
+        mean_shifted = self.bb_sum / n
+        variance = max(self.bb_sum_sq / n - mean_shifted * mean_shifted, 0.0)
+        bb_middle = self.bb_shift + mean_shifted
+        bb_dev = math.sqrt(variance) * self.bb_std
+        
+        atr = self.range_sum / self.atr_period if count > self.atr_period else 0.001
+        sma_50 = self.sum_50 / min(count, 50)
+        
+        self.values = (sma_8, sma_21, sma_55, self.ema_12, self.ema_26, rsi,
+                       bb_middle + bb_dev, bb_middle - bb_dev, bb_middle, atr, sma_50)